@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('templates', 'templates'), ('static', 'static'), ('VERSION', '.')],
-    hiddenimports=[],
+    hiddenimports=['yt_dlp', 'requests'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
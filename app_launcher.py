@@ -5,11 +5,18 @@ import threading
 import time
 import webbrowser
 
-from main import app
+from werkzeug.serving import make_server
+
+from main import app, log_startup_timings, start_background_services, startup_phase
+
+
+def browser_enabled() -> bool:
+    return os.environ.get('BAVA_NO_OPEN_BROWSER', '').lower() not in ('1', 'true', 'yes')
 
 
 def open_browser_when_ready(host: str, port: int):
-    if os.environ.get('BAVA_NO_OPEN_BROWSER', '').lower() in ('1', 'true', 'yes'):
+    # Only used with the debug reloader, where the server runs in a child process.
+    if not browser_enabled():
         return
     for _ in range(120):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
@@ -25,8 +32,23 @@ def main():
     port = int(os.environ.get('FLASK_PORT', '5252'))
     debug = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
 
-    threading.Thread(target=open_browser_when_ready, args=(host, port), daemon=True).start()
-    app.run(debug=debug, host=host, port=port)
+    start_background_services(use_reloader=debug)
+    if debug:
+        threading.Thread(target=open_browser_when_ready, args=(host, port), daemon=True).start()
+        app.run(debug=debug, host=host, port=port)
+        return
+
+    # make_server() returns with the socket already listening, so the browser can be
+    # opened right away instead of polling the port.
+    with startup_phase('server_bind'):
+        server = make_server(host, port, app, threaded=True)
+    log_startup_timings()
+    if browser_enabled():
+        threading.Thread(target=webbrowser.open, args=(f'http://{host}:{port}/',), daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
 
 
 if __name__ == '__main__':
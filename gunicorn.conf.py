@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+# gunicorn 설정: 백그라운드 서비스(작업 재개, 저널 하트비트, 저장소 janitor, 릴리스 갱신)는
+# 요청을 받는 워커 프로세스에서만 시작한다. --preload로 마스터가 main을 불러와도 스레드는 포크 뒤에 만든다.
+
+
+def post_fork(server, worker):
+    from main import start_background_services
+
+    start_background_services()
@@ -1,20 +1,68 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, request, jsonify, send_file, render_template
+import time
+_startup_started_at = time.perf_counter()
+from flask import Flask, Response, request, jsonify, send_file, render_template
 from flask_cors import CORS
-import yt_dlp
 import os
 import uuid
 import re
-import time
 import json
 import sys
 import tempfile
 import subprocess
-import glob
 import shutil
-from urllib.parse import urlparse
+import threading
+import copy
+import functools
+import hashlib
+import sqlite3
+from contextlib import closing, contextmanager
+import importlib
+import random
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlparse, quote
 import logging
-import requests
+
+_startup_timings = OrderedDict(imports=round((time.perf_counter() - _startup_started_at) * 1000, 1))
+
+@contextmanager
+def startup_phase(name):
+    """Time one step of startup; the breakdown is logged by log_startup_timings()."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        _startup_timings[name] = round((time.perf_counter() - started_at) * 1000, 1)
+
+class LazyModule:
+    """
+    Stand-in for a heavy module that is imported on first attribute access.
+    yt-dlp alone takes longer to import than the rest of the app, and the page does not need it.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    with startup_phase(f'import {self._name}'):
+                        self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+yt_dlp = LazyModule('yt_dlp')
+requests = LazyModule('requests')
 
 if getattr(sys, 'frozen', False):
     BASE_DIR = getattr(sys, '_MEIPASS', os.path.dirname(sys.executable))
@@ -25,15 +73,25 @@ TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
 
 app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
-CORS(app)  # 크로스 오리진 요청 허용
+# 크로스 오리진 요청 허용 (이어받기에 필요한 Range 관련 헤더도 노출)
+CORS(app, expose_headers=['Content-Disposition', 'Content-Range', 'Accept-Ranges', 'ETag', 'Last-Modified'])
 
 APP_NAME = 'BaVa Downloader'
-DEFAULT_DOWNLOAD_DIR = '/tmp/downloads'
+DEFAULT_DOWNLOAD_DIR = os.environ.get('DEFAULT_DOWNLOAD_DIR', '/tmp/downloads')
 DEFAULT_APP_VERSION = '0.0.0'
 VERSION_FILE = os.path.join(BASE_DIR, 'VERSION')
 RELEASE_REPOSITORY = os.environ.get('RELEASE_REPOSITORY', os.environ.get('GITHUB_REPOSITORY', '')).strip()
 RELEASE_ASSET_NAME = os.environ.get('RELEASE_ASSET_NAME', 'BaVa.Downloader-macos-x86_64.zip').strip()
 RELEASE_CACHE_TTL_SECONDS = int(os.environ.get('RELEASE_CACHE_TTL_SECONDS', '600'))
+RELEASE_FAILURE_BACKOFF_SECONDS = float(os.environ.get('RELEASE_FAILURE_BACKOFF_SECONDS', '60'))
+RELEASE_FAILURE_BACKOFF_MAX_SECONDS = float(os.environ.get('RELEASE_FAILURE_BACKOFF_MAX_SECONDS', '3600'))
+RELEASE_FORCE_REFRESH_MIN_INTERVAL_SECONDS = float(os.environ.get('RELEASE_FORCE_REFRESH_MIN_INTERVAL_SECONDS', '60'))
+RELEASE_REQUEST_WAIT_SECONDS = float(os.environ.get('RELEASE_REQUEST_WAIT_SECONDS', '4'))
+# 시작 직후 백그라운드에서 yt-dlp를 미리 불러와 첫 다운로드 지연을 줄인다.
+STARTUP_WARMUP = os.environ.get('STARTUP_WARMUP', 'true').lower() in ('1', 'true', 'yes', 'on')
+_warmup_done = threading.Event()
+_background_services_lock = threading.Lock()
+_background_services_started = False
 PRIMARY_SETTINGS_FILE = os.path.join(
     os.path.expanduser('~'),
     'Library',
@@ -47,15 +105,303 @@ SETTINGS_CANDIDATES = [PRIMARY_SETTINGS_FILE, FALLBACK_SETTINGS_FILE]
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-_release_cache = {'fetched_at': 0.0, 'data': None}
+_release_cache = {
+    'fetched_at': 0.0,
+    'data': None,
+    'etag': None,
+    'failures': 0,
+    'retry_at': 0.0,
+    'forced_at': 0.0,
+    'refreshing': False,
+    'refreshes': 0,
+}
+_release_cache_changed = threading.Condition()
+_release_refresh_wakeup = threading.Event()
+_release_refresher_lock = threading.Lock()
+_release_refresher_started = False
 DOWNLOAD_LINK_TTL_SECONDS = int(os.environ.get('DOWNLOAD_LINK_TTL_SECONDS', '86400'))
-_download_file_cache = {}
+DOWNLOAD_TOKEN_STORE = os.environ.get('DOWNLOAD_TOKEN_STORE', 'sqlite').strip().lower()
+DOWNLOAD_TOKEN_DB_FILE = os.environ.get('DOWNLOAD_TOKEN_DB_FILE', '/tmp/bava_downloader_tokens.sqlite3')
+# 만료 토큰은 janitor와 별개로 토큰 발급 N번마다 한 번씩 지운다 (janitor를 꺼도 토큰 테이블이 무한히 자라지 않게).
+DOWNLOAD_TOKEN_SWEEP_EVERY = max(1, int(os.environ.get('DOWNLOAD_TOKEN_SWEEP_EVERY', '100')))
+_download_token_puts = 0
+_download_token_puts_lock = threading.Lock()
+DOWNLOAD_MAX_WORKERS = max(1, int(os.environ.get('DOWNLOAD_MAX_WORKERS', '4')))
+DOWNLOAD_MAX_PENDING_JOBS = max(1, int(os.environ.get('DOWNLOAD_MAX_PENDING_JOBS', '100')))
+DOWNLOAD_JOB_RETENTION_SECONDS = int(os.environ.get('DOWNLOAD_JOB_RETENTION_SECONDS', '3600'))
+_download_jobs = {}
+_download_jobs_lock = threading.Lock()
+_download_jobs_changed = threading.Condition(_download_jobs_lock)
+DOWNLOAD_PROGRESS_MIN_INTERVAL_SECONDS = float(os.environ.get('DOWNLOAD_PROGRESS_MIN_INTERVAL_SECONDS', '0.25'))
+DOWNLOAD_EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('DOWNLOAD_EVENTS_KEEPALIVE_SECONDS', '15'))
+# 한 SSE 응답은 gunicorn 워커 타임아웃(기본 30초)보다 짧게 끊고, EventSource가 Last-Event-ID로 다시 붙는다.
+DOWNLOAD_EVENTS_MAX_SECONDS = float(os.environ.get('DOWNLOAD_EVENTS_MAX_SECONDS', '20'))
+DOWNLOAD_EVENTS_RETRY_MS = int(os.environ.get('DOWNLOAD_EVENTS_RETRY_MS', '1000'))
+_download_batches = {}
+_platform_queues = {}
+_platform_active = {}
+# 후처리로 슬롯을 내준 뒤 다음 네트워크 시도를 위해 슬롯을 다시 기다리는 작업 수 (대기열 작업보다 먼저 받는다).
+_platform_reacquiring = {}
+_platform_slots_lock = threading.Lock()
+_platform_slot_freed = threading.Condition(_platform_slots_lock)
+BATCH_PREFETCH_JOBS = max(1, int(os.environ.get('BATCH_PREFETCH_JOBS', '10')))
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '1000'))
+# /api/video-info/bulk: 항목별 상세 추출 동시 실행 수와 한 요청당 최대 항목 수
+VIDEO_INFO_BULK_MAX_WORKERS = max(1, int(os.environ.get('VIDEO_INFO_BULK_MAX_WORKERS', '4')))
+VIDEO_INFO_BULK_MAX_ITEMS = max(1, int(os.environ.get('VIDEO_INFO_BULK_MAX_ITEMS', '200')))
+_video_info_executor = ThreadPoolExecutor(max_workers=VIDEO_INFO_BULK_MAX_WORKERS, thread_name_prefix='bava-video-info')
+# ffmpeg 후처리(병합/오디오 추출/리먹스)는 CPU 코어 수만큼만 동시에 돌린다.
+POSTPROCESS_MAX_WORKERS = max(1, int(os.environ.get('POSTPROCESS_MAX_WORKERS', str(os.cpu_count() or 2))))
+AUDIO_EXTRACT_CODECS = {'mp3': 'mp3', 'm4a': 'aac'}
+AUDIO_EXTRACT_QUALITY = os.environ.get('AUDIO_EXTRACT_QUALITY', '192')
+_postprocess_executor = ThreadPoolExecutor(max_workers=POSTPROCESS_MAX_WORKERS, thread_name_prefix='bava-postprocess')
+# A job waiting on post-processing gives its network slot back but keeps its thread.
+_download_executor = ThreadPoolExecutor(
+    max_workers=DOWNLOAD_MAX_WORKERS + POSTPROCESS_MAX_WORKERS, thread_name_prefix='bava-download'
+)
+_job_context = threading.local()
+YOUTUBE_RACE_MODE = os.environ.get('YOUTUBE_RACE_MODE', '').lower() in ('1', 'true', 'yes', 'on')
+YOUTUBE_RACE_WIDTH = max(1, int(os.environ.get('YOUTUBE_RACE_WIDTH', '3')))
+YOUTUBE_STRATEGY_WINDOW = max(1, int(os.environ.get('YOUTUBE_STRATEGY_WINDOW', '50')))
+YOUTUBE_STRATEGY_EXPLORE_RATE = float(os.environ.get('YOUTUBE_STRATEGY_EXPLORE_RATE', '0.1'))
+_attempt_stats = {}
+_attempt_stats_lock = threading.Lock()
+# 이전 폴링 루프 설정(횟수 x 간격)을 최대 대기 시간으로 그대로 사용한다.
+DOWNLOAD_FILE_WAIT_TIMEOUT_SECONDS = (
+    int(os.environ.get('DOWNLOAD_FILE_WAIT_ATTEMPTS', '60'))
+    * float(os.environ.get('DOWNLOAD_FILE_WAIT_INTERVAL_SECONDS', '0.5'))
+)
+DOWNLOAD_FILE_WAIT_MAX_INTERVAL_SECONDS = float(os.environ.get('DOWNLOAD_FILE_WAIT_INTERVAL_SECONDS', '0.5'))
+RATE_LIMIT_EXTRACT_PER_MINUTE = os.environ.get('RATE_LIMIT_EXTRACT_PER_MINUTE', 'youtube=30,tiktok=30,instagram=20,facebook=20')
+RATE_LIMIT_DOWNLOAD_PER_MINUTE = os.environ.get('RATE_LIMIT_DOWNLOAD_PER_MINUTE', 'youtube=20,tiktok=20,instagram=12,facebook=12')
+RATE_LIMIT_BURST = max(1, int(os.environ.get('RATE_LIMIT_BURST', '5')))
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.environ.get('RATE_LIMIT_MAX_WAIT_SECONDS', '60'))
+RATE_LIMIT_INFO_MAX_WAIT_SECONDS = float(os.environ.get('RATE_LIMIT_INFO_MAX_WAIT_SECONDS', '5'))
+THROTTLE_BACKOFF_BASE_SECONDS = float(os.environ.get('THROTTLE_BACKOFF_BASE_SECONDS', '5'))
+THROTTLE_BACKOFF_MAX_SECONDS = float(os.environ.get('THROTTLE_BACKOFF_MAX_SECONDS', '300'))
+_rate_buckets = {}
+_throttle_state = {}
+_rate_limit_lock = threading.Lock()
+# 다운로드 튜닝 프로필: 조각(fragment) 동시 다운로드, 청크 크기, 속도 제한, 외부 다운로더.
+DOWNLOAD_TUNING_PROFILES = {
+    'balanced': {
+        'concurrent_fragments': 4,
+        'http_chunk_size': '10M',
+        'buffer_size': '1M',
+        'rate_limit': None,
+        'external_downloader': None,
+    },
+    'fast': {
+        'concurrent_fragments': 8,
+        'http_chunk_size': '10M',
+        'buffer_size': '4M',
+        'rate_limit': None,
+        'external_downloader': 'aria2c',
+    },
+    'gentle': {
+        'concurrent_fragments': 1,
+        'http_chunk_size': None,
+        'buffer_size': '1M',
+        'rate_limit': '2M',
+        'external_downloader': None,
+    },
+}
+DEFAULT_DOWNLOAD_TUNING_PROFILE = 'balanced'
+DOWNLOAD_TUNING_KEYS = ('concurrent_fragments', 'http_chunk_size', 'buffer_size', 'rate_limit', 'external_downloader')
+EXTERNAL_DOWNLOADERS = ('aria2c', 'axel', 'curl', 'wget', 'ffmpeg')
+MAX_CONCURRENT_FRAGMENTS = 16
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', str(64 * 1024)))
+MEDIA_EXTS = {'mp4', 'webm', 'mp3', 'm4a', 'mkv', 'mov'}
+BLOCKED_EXTS = {'mhtml', 'html', 'htm', 'json', 'txt'}
+EXTRACT_CACHE_MAX_ENTRIES = int(os.environ.get('EXTRACT_CACHE_MAX_ENTRIES', '256'))
+EXTRACT_CACHE_TTL_SECONDS = int(os.environ.get('EXTRACT_CACHE_TTL_SECONDS', '300'))
+_extract_cache = OrderedDict()
+_extract_cache_lock = threading.Lock()
+_extract_cache_stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+# 단축 링크는 리다이렉트를 한 번만 따라가고 정식 URL을 캐시한다(youtu.be는 네트워크 없이 변환된다).
+SHORT_LINK_HOSTS = {
+    'tiktok': ('vm.tiktok.com', 'vt.tiktok.com'),
+    'facebook': ('fb.watch',),
+}
+# 단축 링크가 가리켜도 되는 정식 영상 경로. 로그인/홈 화면으로 튕긴 결과는 받아들이지 않는다.
+# (path pattern, required query pattern or None)
+SHORT_LINK_CANONICAL_PATTERNS = {
+    'tiktok': ((re.compile(r'^/@[^/]+/(?:video|photo)/\d+/?$'), None),),
+    'facebook': (
+        (re.compile(r'^/watch/?$'), re.compile(r'(?:^|&)v=\d+')),
+        (re.compile(r'^/reel/\d+/?$'), None),
+        (re.compile(r'^/[^/]+/videos/(?:[^/]+/)?\d+/?$'), None),
+    ),
+}
+SHORT_LINK_CACHE_MAX_ENTRIES = int(os.environ.get('SHORT_LINK_CACHE_MAX_ENTRIES', '1024'))
+SHORT_LINK_CACHE_TTL_SECONDS = int(os.environ.get('SHORT_LINK_CACHE_TTL_SECONDS', '86400'))
+SHORT_LINK_RESOLVE_TIMEOUT_SECONDS = float(os.environ.get('SHORT_LINK_RESOLVE_TIMEOUT_SECONDS', '5'))
+_short_link_cache = OrderedDict()
+_short_link_cache_lock = threading.Lock()
+_short_link_cache_stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'failures': 0}
+# 썸네일은 한 번만 받아 디스크 LRU 캐시에 두고 /api/thumbnails/<id>로 제공한다(CDN 핫링크 차단/서명 만료 대응).
+THUMBNAIL_CACHE_DIR = os.environ.get('THUMBNAIL_CACHE_DIR', '/tmp/bava_thumbnails')
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get('THUMBNAIL_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+THUMBNAIL_MAX_BYTES = int(os.environ.get('THUMBNAIL_MAX_BYTES', str(5 * 1024 * 1024)))
+THUMBNAIL_CACHE_MAX_AGE_SECONDS = int(os.environ.get('THUMBNAIL_CACHE_MAX_AGE_SECONDS', '86400'))
+# 아직 받지 않은 썸네일의 출처 기록은 이 기간이 지나면 지운다.
+THUMBNAIL_SOURCE_TTL_SECONDS = int(os.environ.get('THUMBNAIL_SOURCE_TTL_SECONDS', str(7 * 24 * 3600)))
+THUMBNAIL_EXTS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'}
+# id→출처 매핑과 LRU 용량 계산은 모든 워커가 공유하도록 SQLite에 둔다.
+THUMBNAIL_INDEX_ENABLED = os.environ.get('THUMBNAIL_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+THUMBNAIL_DB_FILE = os.environ.get('THUMBNAIL_DB_FILE', '/tmp/bava_downloader_thumbnails.sqlite3')
+_thumbnail_stats_lock = threading.Lock()
+_thumbnail_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'failures': 0}
+_inflight_downloads = {}
+# yt-dlp HTTP 세션(keep-alive 연결, 쿠키)과 추출기 인스턴스를 체크아웃/체크인 방식으로 재사용한다.
+# 요청마다 새 스레드가 뜨는 서버에서도 세션이 스레드와 함께 버려지지 않는다.
+YTDL_POOL_ENABLED = os.environ.get('YTDL_POOL_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+YTDL_POOL_MAX_AGE_SECONDS = int(os.environ.get('YTDL_POOL_MAX_AGE_SECONDS', '600'))
+YTDL_POOL_MAX_USES = int(os.environ.get('YTDL_POOL_MAX_USES', '100'))
+YTDL_POOL_MAX_IDLE = max(1, int(os.environ.get('YTDL_POOL_MAX_IDLE', '8')))
+# Options the HTTP handlers/extractors are built from; everything else is a per-request override.
+YTDL_SESSION_OPTION_KEYS = (
+    'http_headers', 'nocheckcertificate', 'extractor_args', 'proxy', 'source_address',
+    'impersonate', 'socket_timeout', 'cookiefile', 'cookiesfrombrowser',
+)
+_ytdl_pool_lock = threading.Lock()
+_ytdl_idle_sessions = []  # (profile key, session), least recently used first
+# 세션 재사용은 yt-dlp 내부 속성에 기대므로 requirements.txt에 버전을 고정하고, 속성이 없으면 풀을 쓰지 않는다.
+_ytdl_pool_supported = None
+MEDIA_INDEX_ENABLED = os.environ.get('MEDIA_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+MEDIA_INDEX_DB_FILE = os.environ.get('MEDIA_INDEX_DB_FILE', '/tmp/bava_downloader_media.sqlite3')
+JOB_JOURNAL_ENABLED = os.environ.get('JOB_JOURNAL_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+JOB_JOURNAL_DB_FILE = os.environ.get('JOB_JOURNAL_DB_FILE', '/tmp/bava_downloader_jobs.sqlite3')
+JOB_JOURNAL_UNFINISHED_STATES = ('queued', 'resumed', 'running', 'attempt')
+# 같은 PID가 재사용돼도(컨테이너 재시작) 이전 프로세스의 기록과 구분되도록 실행마다 고유한 값을 붙인다.
+_journal_owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+# owner의 생존 여부는 PID가 아니라 lease로 판단한다. 하트비트가 lease 시간 동안 끊기면 죽은 것으로 보고 작업을 넘겨받는다.
+JOB_JOURNAL_HEARTBEAT_SECONDS = float(os.environ.get('JOB_JOURNAL_HEARTBEAT_SECONDS', '20'))
+JOB_JOURNAL_LEASE_SECONDS = float(os.environ.get('JOB_JOURNAL_LEASE_SECONDS', '90'))
+_journal_heartbeat_started = False
+STORAGE_QUOTA_BYTES = int(os.environ.get('STORAGE_QUOTA_BYTES', str(5 * 1024 ** 3)))
+STORAGE_MIN_FREE_BYTES = int(os.environ.get('STORAGE_MIN_FREE_BYTES', str(1024 ** 3)))
+STORAGE_JANITOR_INTERVAL_SECONDS = float(os.environ.get('STORAGE_JANITOR_INTERVAL_SECONDS', '60'))
+STORAGE_ORPHAN_SWEEP_INTERVAL_SECONDS = float(os.environ.get('STORAGE_ORPHAN_SWEEP_INTERVAL_SECONDS', '900'))
+STORAGE_ORPHAN_MAX_AGE_SECONDS = int(os.environ.get('STORAGE_ORPHAN_MAX_AGE_SECONDS', '3600'))
+# 전송 중 기록은 워커가 죽으면 지워지지 않으므로 이 시간이 지나면 보호하지 않는다.
+STORAGE_SERVING_MAX_AGE_SECONDS = int(os.environ.get('STORAGE_SERVING_MAX_AGE_SECONDS', str(6 * 3600)))
+# 벤치마크처럼 임시 환경에서 main을 불러올 때는 janitor(퇴출/고아 파일 정리)를 끌 수 있다.
+STORAGE_JANITOR_ENABLED = os.environ.get('STORAGE_JANITOR_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+_storage_stats = {
+    'used_bytes': 0,
+    'free_bytes': None,
+    'managed_files': 0,
+    'evicted_files': 0,
+    'evicted_bytes': 0,
+    'orphans_removed': 0,
+    'last_run_at': None,
+}
+_storage_stats_lock = threading.Lock()
+_storage_janitor_started = False
+# 이 프로세스에서 전송 중인 파일 (지표용). 워커 간 보호는 미디어 인덱스의 media_serving 테이블이 맡는다.
+_serving_paths = {}
+_serving_paths_lock = threading.Lock()
+PLATFORM_EXTRACTOR_KEYS = {
+    'youtube': 'Youtube',
+    'tiktok': 'TikTok',
+    'instagram': 'Instagram',
+    'facebook': 'Facebook',
+}
+_inflight_downloads_lock = threading.Lock()
 DOWNLOAD_DEBUG_LOGS = os.environ.get('DOWNLOAD_DEBUG_LOGS', '').lower() in ('1', 'true', 'yes', 'on')
 
 def debug_log(message, *args):
     if DOWNLOAD_DEBUG_LOGS:
         logger.info(f"[download-debug] {message}", *args)
 
+# Prometheus 텍스트 포맷으로 내보내는 프로세스 단위 지표 (gunicorn 워커마다 따로 집계된다).
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+METRIC_DEFINITIONS = {
+    'bava_extraction_seconds': ('histogram', 'Time until media metadata was resolved, per platform and attempt label.', LATENCY_BUCKETS),
+    'bava_download_attempts_total': ('counter', 'yt-dlp strategy attempts by outcome.', None),
+    'bava_download_bytes_total': ('counter', 'Bytes downloaded from origin sites.', None),
+    'bava_download_seconds': ('histogram', 'Transfer time of a single downloaded file.', LATENCY_BUCKETS),
+    'bava_postprocess_seconds': ('histogram', 'Merge/post-processing time per yt-dlp postprocessor.', LATENCY_BUCKETS),
+    'bava_file_wait_checks': ('histogram', 'Output-file wait loop iterations after a download.', COUNT_BUCKETS),
+    'bava_download_errors_total': ('counter', 'Download attempt errors by class.', None),
+    'bava_download_jobs_total': ('counter', 'Finished download jobs by status.', None),
+    'bava_download_job_queue_seconds': ('histogram', 'Time jobs spent queued before a worker picked them up.', LATENCY_BUCKETS),
+    'bava_download_job_seconds': ('histogram', 'Run time of download jobs on a worker.', LATENCY_BUCKETS),
+    'bava_files_served_bytes_total': ('counter', 'Bytes sent by /api/files.', None),
+    'bava_postprocess_queue_seconds': ('histogram', 'Time post-processing waited for a free ffmpeg slot.', LATENCY_BUCKETS),
+    'bava_ytdl_sessions_total': ('counter', 'Pooled yt-dlp sessions by outcome (created/reused/retired).', None),
+}
+_metric_series = {name: {} for name in METRIC_DEFINITIONS}
+_metrics_lock = threading.Lock()
+
+def metric_inc(name, value=1, **labels):
+    key = tuple(sorted(labels.items()))
+    with _metrics_lock:
+        series = _metric_series[name]
+        series[key] = series.get(key, 0) + value
+
+def metric_observe(name, value, **labels):
+    if value is None:
+        return
+    buckets = METRIC_DEFINITIONS[name][2]
+    key = tuple(sorted(labels.items()))
+    with _metrics_lock:
+        state = _metric_series[name].get(key)
+        if state is None:
+            state = _metric_series[name][key] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        for idx, bound in enumerate(buckets):
+            if value <= bound:
+                state['buckets'][idx] += 1
+        state['sum'] += value
+        state['count'] += 1
+
+def format_metric_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+def render_metrics(gauges=()):
+    """Render all metrics (plus `gauges`: (name, help, [(labels, value)])) in Prometheus text format."""
+    lines = []
+    with _metrics_lock:
+        for name, (metric_type, help_text, buckets) in METRIC_DEFINITIONS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for key, value in sorted(_metric_series[name].items()):
+                if metric_type == 'counter':
+                    lines.append(f'{name}{format_metric_labels(key)} {value}')
+                    continue
+                for bound, count in zip(buckets, value['buckets']):
+                    lines.append(f'{name}_bucket{format_metric_labels(key + (("le", bound),))} {count}')
+                lines.append(f'{name}_bucket{format_metric_labels(key + (("le", "+Inf"),))} {value["count"]}')
+                lines.append(f'{name}_sum{format_metric_labels(key)} {value["sum"]}')
+                lines.append(f'{name}_count{format_metric_labels(key)} {value["count"]}')
+    for name, help_text, samples in gauges:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in samples:
+            lines.append(f'{name}{format_metric_labels(tuple(sorted(labels.items())))} {value}')
+    return '\n'.join(lines) + '\n'
+
+def classify_download_error(err_text):
+    if 'non-media format resolved: mhtml' in err_text:
+        return 'mhtml'
+    if 'non-media format resolved' in err_text:
+        return 'non_media_ext'
+    if 'non-youtube extractor resolved' in err_text:
+        return 'non_youtube_extractor'
+    if 'HTTP Error 403' in err_text:
+        return 'http_403'
+    if 'HTTP Error 429' in err_text or 'Too Many Requests' in err_text:
+        return 'http_429'
+    return 'other'
+
 def get_version_file_candidates():
     candidates = []
 
@@ -109,22 +455,29 @@ def load_app_version():
     logger.warning(f"VERSION file not found in candidates: {version_files}")
     return DEFAULT_APP_VERSION
 
-APP_VERSION = load_app_version()
+with startup_phase('load_app_version'):
+    APP_VERSION = load_app_version()
 
-def fetch_latest_release():
+def fetch_latest_release(etag=None):
+    """
+    Query the latest GitHub release, conditionally when an ETag is known.
+    Returns (status, release_data, etag) with status 'ok', 'not_modified' or 'failed'.
+    """
     if not RELEASE_REPOSITORY:
-        return None
+        return 'failed', None, None
 
     api_url = f"https://api.github.com/repos/{RELEASE_REPOSITORY}/releases/latest"
+    headers = {'Accept': 'application/vnd.github+json'}
+    if etag:
+        # 304 응답은 GitHub API 호출 한도에 포함되지 않는다.
+        headers['If-None-Match'] = etag
     try:
-        response = requests.get(
-            api_url,
-            headers={'Accept': 'application/vnd.github+json'},
-            timeout=4,
-        )
+        response = requests.get(api_url, headers=headers, timeout=4)
+        if response.status_code == 304:
+            return 'not_modified', None, etag
         if response.status_code != 200:
             logger.warning(f"GitHub release API returned status {response.status_code}")
-            return None
+            return 'failed', None, None
 
         release = response.json()
         assets = release.get('assets') or []
@@ -132,7 +485,7 @@ def fetch_latest_release():
         zip_asset = next((asset for asset in assets if str(asset.get('name', '')).endswith('.zip')), None)
         selected_asset = preferred_asset or zip_asset
 
-        return {
+        return 'ok', {
             'tag_name': release.get('tag_name'),
             'name': release.get('name'),
             'published_at': release.get('published_at'),
@@ -140,21 +493,78 @@ def fetch_latest_release():
             'asset_name': selected_asset.get('name') if selected_asset else None,
             'asset_download_url': selected_asset.get('browser_download_url') if selected_asset else release.get('html_url'),
             'repository': RELEASE_REPOSITORY,
-        }
+        }, response.headers.get('ETag')
     except Exception as e:
         logger.warning(f"Failed to fetch latest release from GitHub: {e}")
-        return None
+        return 'failed', None, None
 
-def get_release_info(force_refresh=False):
+def refresh_release_info():
+    with _release_cache_changed:
+        _release_cache['refreshing'] = True
+        etag = _release_cache['etag'] if _release_cache['data'] is not None else None
+    status, release_data, etag = fetch_latest_release(etag)
     now = time.time()
-    if not force_refresh and _release_cache['data'] is not None and now - _release_cache['fetched_at'] < RELEASE_CACHE_TTL_SECONDS:
-        return _release_cache['data']
+    with _release_cache_changed:
+        if status == 'failed':
+            # 실패도 캐시해서(지수 백오프) 요청마다 GitHub를 다시 두드리지 않는다.
+            _release_cache['failures'] += 1
+            delay = min(
+                RELEASE_FAILURE_BACKOFF_MAX_SECONDS,
+                RELEASE_FAILURE_BACKOFF_SECONDS * (2 ** (_release_cache['failures'] - 1)),
+            )
+            _release_cache['retry_at'] = now + delay
+        else:
+            if status == 'ok':
+                _release_cache['data'] = release_data
+                _release_cache['etag'] = etag
+            _release_cache['fetched_at'] = now
+            _release_cache['failures'] = 0
+            _release_cache['retry_at'] = now + RELEASE_CACHE_TTL_SECONDS
+        _release_cache['refreshing'] = False
+        _release_cache['refreshes'] += 1
+        _release_cache_changed.notify_all()
+    debug_log("release refresh status=%s failures=%s", status, _release_cache['failures'])
+
+def run_release_refresher():
+    """Keep the release cache warm; pages only ever read the cached value."""
+    while True:
+        refresh_release_info()
+        with _release_cache_changed:
+            delay = _release_cache['retry_at'] - time.time()
+        _release_refresh_wakeup.wait(timeout=max(1.0, delay))
+        _release_refresh_wakeup.clear()
+
+def start_release_refresher():
+    global _release_refresher_started
+    if not RELEASE_REPOSITORY:
+        return
+    with _release_refresher_lock:
+        if _release_refresher_started:
+            return
+        _release_refresher_started = True
+    threading.Thread(target=run_release_refresher, name='bava-release-refresher', daemon=True).start()
 
-    release_data = fetch_latest_release()
-    if release_data is not None:
-        _release_cache['data'] = release_data
-        _release_cache['fetched_at'] = now
-    return _release_cache['data']
+def get_release_info(force_refresh=False, wait=0.0):
+    """
+    Return the cached release (stale-while-revalidate). Never calls GitHub on the caller's
+    thread; force_refresh wakes the refresher at most once per
+    RELEASE_FORCE_REFRESH_MIN_INTERVAL_SECONDS. With `wait`, blocks up to that long for
+    the first lookup when nothing is cached yet. The refresher itself is started by
+    start_background_services.
+    """
+    with _release_cache_changed:
+        now = time.time()
+        if force_refresh and now - _release_cache['forced_at'] >= RELEASE_FORCE_REFRESH_MIN_INTERVAL_SECONDS:
+            _release_cache['forced_at'] = now
+            _release_refresh_wakeup.set()
+        pending = _release_cache['refreshing'] or _release_refresh_wakeup.is_set()
+        if wait and _release_cache['data'] is None and pending:
+            seen = _release_cache['refreshes']
+            _release_cache_changed.wait_for(
+                lambda: _release_cache['data'] is not None or _release_cache['refreshes'] > seen,
+                timeout=wait,
+            )
+        return _release_cache['data']
 
 def normalize_download_dir(path):
     if not path or not isinstance(path, str):
@@ -181,7 +591,7 @@ def build_format_selector(format_code, quality, platform):
     requested_format = str(format_code or 'best').strip().lower()
     requested_quality = str(quality or 'best').strip().lower()
 
-    if requested_format == 'mp3':
+    if requested_format in AUDIO_EXTRACT_CODECS:
         return 'bestaudio/best'
 
     if platform != 'youtube':
@@ -204,41 +614,270 @@ def build_format_selector(format_code, quality, platform):
         return "bestvideo*+bestaudio/best"
     return "best"
 
+def build_postprocess_options(format_code):
+    """
+    yt-dlp options for the conversion a requested format needs: audio extraction for
+    mp3/m4a and an mp4 container for mp4. Empty when ffmpeg is not installed.
+    """
+    requested_format = str(format_code or 'best').strip().lower()
+    if not shutil.which('ffmpeg'):
+        return {}
+    if requested_format in AUDIO_EXTRACT_CODECS:
+        return {'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': AUDIO_EXTRACT_CODECS[requested_format],
+            'preferredquality': AUDIO_EXTRACT_QUALITY,
+        }]}
+    if requested_format == 'mp4':
+        return {
+            'merge_output_format': 'mp4',
+            'postprocessors': [{'key': 'FFmpegVideoRemuxer', 'preferedformat': 'mp4'}],
+        }
+    return {}
+
+def build_output_key(selected_format, format_code):
+    """Media index / single-flight key: the selector plus the conversion applied to its output."""
+    conversions = [
+        f"{pp['key']}:{pp.get('preferredcodec') or pp.get('preferedformat')}"
+        for pp in build_postprocess_options(format_code).get('postprocessors', [])
+    ]
+    return '>'.join([selected_format] + conversions)
+
+def route_postprocessing_to_pool(ydl):
+    """
+    Run this YoutubeDL's ffmpeg post-processors (merge, audio extraction, remux, fixups)
+    on the post-processing pool. The calling download job hands its network slot to the
+    next queued job while it waits.
+    """
+    run_pp = ydl.run_pp
+
+    def pooled_run_pp(pp, infodict, *args, **kwargs):
+        if not isinstance(pp, yt_dlp.postprocessor.FFmpegPostProcessor):
+            return run_pp(pp, infodict, *args, **kwargs)
+        release_network_slot = getattr(_job_context, 'release_network_slot', None)
+        if release_network_slot:
+            release_network_slot()
+        submitted_at = time.time()
+
+        def run():
+            metric_observe('bava_postprocess_queue_seconds', time.time() - submitted_at)
+            return run_pp(pp, infodict, *args, **kwargs)
+
+        return _postprocess_executor.submit(run).result()
+
+    ydl.run_pp = pooled_run_pp
+    return ydl
+
+def close_ytdl_session(session, reason):
+    if session.get('director') is not None:
+        session['director'].close()
+    metric_inc('bava_ytdl_sessions_total', platform=session['platform'], outcome='retired')
+    debug_log("ytdl session retired platform=%s reason=%s uses=%s", session['platform'], reason, session['uses'])
+
+def ytdl_pool_supported():
+    """
+    Whether the installed yt-dlp still has the private internals session reuse touches:
+    the cookiejar/_request_director cached properties and the _YDLLogger the director shares
+    with its handlers. Checked once; when they are gone every request gets a plain YoutubeDL.
+    """
+    global _ytdl_pool_supported
+    if _ytdl_pool_supported is None:
+        try:
+            supported = (
+                isinstance(vars(yt_dlp.YoutubeDL).get('cookiejar'), functools.cached_property)
+                and isinstance(vars(yt_dlp.YoutubeDL).get('_request_director'), functools.cached_property)
+                and '_ydl' in vars(yt_dlp.utils._utils._YDLLogger())
+            )
+        except (AttributeError, TypeError):
+            supported = False
+        if not supported:
+            logger.warning(f"yt-dlp {yt_dlp.version.__version__} changed the internals the session pool uses; pooling disabled")
+        _ytdl_pool_supported = supported
+    return _ytdl_pool_supported
+
+def is_director_rebindable(director):
+    """The director's logger and every handler's logger can be pointed at another YoutubeDL."""
+    return hasattr(director.logger, '_ydl') and all(
+        getattr(handler, '_logger', None) is director.logger for handler in director.handlers.values()
+    )
+
+def bind_ytdl_session(session, ydl):
+    """Point the pooled director's logger and extractors at `ydl`, or detach them when it is None."""
+    director = session['director']
+    if director is not None:
+        # build_request_director shares one _YDLLogger between the director and all its handlers.
+        director.logger._ydl = ydl
+        for handler in director.handlers.values():
+            handler._logger = director.logger
+    for ie in session['extractors'].values():
+        ie.set_downloader(ydl)
+
+def checkout_ytdl_session(key):
+    with _ytdl_pool_lock:
+        for index in range(len(_ytdl_idle_sessions) - 1, -1, -1):
+            if _ytdl_idle_sessions[index][0] == key:
+                session = _ytdl_idle_sessions.pop(index)[1]
+                break
+        else:
+            return None
+    if time.time() - session['created_at'] > YTDL_POOL_MAX_AGE_SECONDS or session['uses'] >= YTDL_POOL_MAX_USES:
+        close_ytdl_session(session, 'expired')
+        return None
+    return session
+
+def checkin_ytdl_session(key, session):
+    with _ytdl_pool_lock:
+        _ytdl_idle_sessions.append((key, session))
+        evicted = [entry[1] for entry in _ytdl_idle_sessions[:-YTDL_POOL_MAX_IDLE]]
+        del _ytdl_idle_sessions[:-YTDL_POOL_MAX_IDLE]
+    for stale in evicted:
+        close_ytdl_session(stale, 'evicted')
+
+@contextmanager
+def pooled_youtube_dl(opts, platform):
+    """
+    YoutubeDL for one request that reuses an idle session for the same option profile.
+
+    A fresh YoutubeDL is built from `opts` every time, so format, hooks, post-processors and
+    output template are always exactly the caller's. What carries over is the expensive state:
+    the request director (keep-alive connections), its cookie jar and the extractor instances
+    (e.g. YouTube's player cache). YoutubeDL is not thread-safe, so a session is checked out
+    by one request at a time and checked back in when it exits, whichever thread it ran on;
+    sessions are retired after YTDL_POOL_MAX_AGE_SECONDS or YTDL_POOL_MAX_USES and at most
+    YTDL_POOL_MAX_IDLE are kept.
+    """
+    if not YTDL_POOL_ENABLED or not ytdl_pool_supported():
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            yield ydl
+        return
+
+    key = (platform, json.dumps({k: opts.get(k) for k in YTDL_SESSION_OPTION_KEYS}, sort_keys=True, default=str))
+    session = checkout_ytdl_session(key)
+
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        if session:
+            bind_ytdl_session(session, ydl)
+            if session['director'] is not None:
+                ydl.__dict__['cookiejar'] = session['cookiejar']
+                ydl.__dict__['_request_director'] = session['director']
+            for ie in session['extractors'].values():
+                # Replacing existing keys keeps yt-dlp's extractor order intact.
+                ydl.add_info_extractor(ie)
+            metric_inc('bava_ytdl_sessions_total', platform=platform, outcome='reused')
+        else:
+            session = {'platform': platform, 'created_at': time.time(), 'uses': 0, 'director': None, 'cookiejar': None}
+            metric_inc('bava_ytdl_sessions_total', platform=platform, outcome='created')
+        try:
+            yield ydl
+        finally:
+            # Detach the shared state before YoutubeDL.close() tears the director down.
+            director = ydl.__dict__.pop('_request_director', None)
+            if director is not None and not is_director_rebindable(director):
+                # 로거를 다른 YoutubeDL로 옮길 수 없으면 닫힌 YoutubeDL을 가리키게 되므로 버린다.
+                director.close()
+                director = None
+                session.update(director=None, cookiejar=None)
+            if director is not None:
+                session.update(director=director, cookiejar=ydl.cookiejar)
+            session['extractors'] = dict(getattr(ydl, '_ies_instances', {}))
+            session['uses'] += 1
+            # An idle session must not keep this request's YoutubeDL (and its hook closures) alive.
+            bind_ytdl_session(session, None)
+            checkin_ytdl_session(key, session)
+
 def build_youtube_download_attempts(format_code, quality, primary_selector):
+    """
+    Player-client strategies for one YouTube download. Every strategy uses the requested
+    selector, so the adaptive ordering can promote any of them without changing what the
+    user gets (webm stays webm, mp3 stays audio-only). Only the pinned last resort drops to
+    a single-file variant of the same selector.
+    """
+    player_clients = (
+        ('primary-web', ['web']),
+        ('android-fallback', ['android', 'web']),
+        ('ios-fallback', ['ios', 'web']),
+        ('tv-embedded-fallback', ['tv_embedded', 'android', 'web']),
+        ('mweb-fallback', ['mweb', 'android', 'web']),
+    )
     attempts = [{
-        'label': 'primary-web',
+        'label': label,
         'format': primary_selector,
-        'extractor_args': {'youtube': {'player_client': ['web']}},
-    }]
-    attempts.append({
-        'label': 'android-fallback',
-        'format': "bestvideo*+bestaudio/best",
-        'extractor_args': {'youtube': {'player_client': ['android', 'web']}},
-    })
-    attempts.append({
-        'label': 'ios-fallback',
-        'format': "bestvideo*+bestaudio/best",
-        'extractor_args': {'youtube': {'player_client': ['ios', 'web']}},
-    })
-    attempts.append({
-        'label': 'tv-embedded-fallback',
-        'format': "bestvideo*+bestaudio/best",
-        'extractor_args': {'youtube': {'player_client': ['tv_embedded', 'android', 'web']}},
-    })
-    attempts.append({
-        'label': 'mweb-fallback',
-        'format': "bestvideo*+bestaudio/best",
-        'extractor_args': {'youtube': {'player_client': ['mweb', 'android', 'web']}},
-    })
+        'extractor_args': {'youtube': {'player_client': clients}},
+    } for label, clients in player_clients]
     attempts.append({
         'label': 'plain-best-final',
-        'format': "best",
+        'format': build_single_file_selector(primary_selector),
         'extractor_args': {'youtube': {'player_client': ['web']}},
     })
     return attempts
 
+def record_attempt_outcome(label, success, elapsed):
+    if not label or label == 'cached-info':
+        return
+    with _attempt_stats_lock:
+        stats = _attempt_stats.setdefault(label, {
+            'recent': deque(maxlen=YOUTUBE_STRATEGY_WINDOW),
+            'total_attempts': 0,
+            'total_successes': 0,
+            'last_success_at': None,
+            'last_failure_at': None,
+        })
+        stats['recent'].append((bool(success), float(elapsed)))
+        stats['total_attempts'] += 1
+        if success:
+            stats['total_successes'] += 1
+            stats['last_success_at'] = time.time()
+        else:
+            stats['last_failure_at'] = time.time()
+
+def summarize_attempt_stats(label):
+    """Rolling health of one strategy label; success rate is Laplace-smoothed."""
+    stats = _attempt_stats.get(label)
+    recent = list(stats['recent']) if stats else []
+    successes = sum(1 for success, _ in recent if success)
+    latencies = [elapsed for success, elapsed in recent if success]
+    return {
+        'label': label,
+        'window_attempts': len(recent),
+        'window_successes': successes,
+        'success_rate': (successes + 1) / (len(recent) + 2),
+        'avg_success_latency': sum(latencies) / len(latencies) if latencies else None,
+        'total_attempts': stats['total_attempts'] if stats else 0,
+        'total_successes': stats['total_successes'] if stats else 0,
+        'last_success_at': stats['last_success_at'] if stats else None,
+        'last_failure_at': stats['last_failure_at'] if stats else None,
+    }
+
+def order_download_attempts(attempts, explore=True):
+    """
+    Put the strategies that are succeeding right now first.
+    The last attempt is a quality-degrading last resort and stays pinned at the end.
+    With probability YOUTUBE_STRATEGY_EXPLORE_RATE a random strategy is promoted so
+    clients that recovered from a block get noticed again.
+    """
+    if len(attempts) <= 2:
+        return list(attempts)
+    adaptive, pinned = list(attempts[:-1]), attempts[-1]
+    with _attempt_stats_lock:
+        summaries = {attempt['label']: summarize_attempt_stats(attempt['label']) for attempt in adaptive}
+
+    def sort_key(attempt):
+        summary = summaries[attempt['label']]
+        latency = summary['avg_success_latency']
+        return (-summary['success_rate'], latency if latency is not None else float('inf'))
+
+    ordered = sorted(adaptive, key=sort_key)
+    if explore and random.random() < YOUTUBE_STRATEGY_EXPLORE_RATE:
+        explored = ordered.pop(random.randrange(len(ordered)))
+        ordered.insert(0, explored)
+        debug_log("strategy exploration label=%s", explored['label'])
+    return ordered + [pinned]
+
 def load_settings():
-    settings = {'download_dir': DEFAULT_DOWNLOAD_DIR}
+    settings = {
+        'download_dir': DEFAULT_DOWNLOAD_DIR,
+        'download_tuning': {'profile': DEFAULT_DOWNLOAD_TUNING_PROFILE},
+    }
     for settings_file in SETTINGS_CANDIDATES:
         try:
             if os.path.exists(settings_file):
@@ -267,13 +906,97 @@ def save_settings(settings):
     if last_error:
         raise last_error
 
-APP_SETTINGS = load_settings()
+with startup_phase('load_settings'):
+    APP_SETTINGS = load_settings()
 
 def get_download_dir():
     active_dir = normalize_download_dir(APP_SETTINGS.get('download_dir'))
     os.makedirs(active_dir, exist_ok=True)
     return active_dir
 
+def parse_byte_size(value):
+    if value in (None, '', 0):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, (int, float)):
+        size = int(value)
+    else:
+        size = yt_dlp.utils.parse_bytes(str(value).strip())
+    if not size or size <= 0:
+        raise ValueError(value)
+    return size
+
+def normalize_download_tuning(raw, base=None):
+    """
+    Merge a tuning request ({"profile", ...overrides}) onto `base` (the saved settings).
+    Returns (tuning, error): tuning keeps the raw values as given so it can be saved and
+    echoed back; error is a user-facing message when a value is invalid.
+    """
+    tuning = dict(base or {'profile': DEFAULT_DOWNLOAD_TUNING_PROFILE})
+    if raw is None:
+        return tuning, None
+    if isinstance(raw, str):
+        raw = {'profile': raw}
+    if not isinstance(raw, dict):
+        return None, '다운로드 설정 형식이 올바르지 않습니다'
+
+    if raw.get('profile'):
+        if raw['profile'] not in DOWNLOAD_TUNING_PROFILES:
+            return None, f"알 수 없는 다운로드 프로필입니다: {raw['profile']}"
+        # 프로필을 바꾸면 이전 프로필에 덧붙인 개별 값은 버린다.
+        tuning = {'profile': raw['profile']}
+    for key in DOWNLOAD_TUNING_KEYS:
+        if key in raw:
+            tuning[key] = raw[key]
+
+    if tuning.get('concurrent_fragments') is not None:
+        try:
+            fragments = int(tuning['concurrent_fragments'])
+        except (TypeError, ValueError):
+            fragments = 0
+        if not 1 <= fragments <= MAX_CONCURRENT_FRAGMENTS:
+            return None, f'동시 조각 다운로드 수는 1~{MAX_CONCURRENT_FRAGMENTS} 사이여야 합니다'
+        tuning['concurrent_fragments'] = fragments
+    for key in ('http_chunk_size', 'buffer_size', 'rate_limit'):
+        try:
+            parse_byte_size(tuning.get(key))
+        except (TypeError, ValueError):
+            return None, f'{key} 값이 올바르지 않습니다 (예: 10M, 512K)'
+    downloader = tuning.get('external_downloader')
+    if downloader and downloader not in EXTERNAL_DOWNLOADERS:
+        return None, f'지원하지 않는 외부 다운로더입니다: {downloader}'
+    return tuning, None
+
+def resolve_download_tuning(tuning):
+    """Expand a normalized tuning dict (profile + overrides) into concrete values."""
+    tuning = tuning or {}
+    resolved = dict(DOWNLOAD_TUNING_PROFILES.get(tuning.get('profile'), DOWNLOAD_TUNING_PROFILES[DEFAULT_DOWNLOAD_TUNING_PROFILE]))
+    resolved.update({key: tuning[key] for key in DOWNLOAD_TUNING_KEYS if key in tuning})
+    downloader = resolved.get('external_downloader')
+    if downloader and not shutil.which(downloader):
+        logger.warning(f"External downloader {downloader} not found, using the built-in downloader")
+        resolved['external_downloader'] = None
+    return resolved
+
+def apply_download_tuning(ydl_opts, tuning):
+    """Set yt-dlp transfer options for a (resolved) tuning profile on ydl_opts in place."""
+    ydl_opts['concurrent_fragment_downloads'] = tuning.get('concurrent_fragments') or 1
+    for key, opt in (('http_chunk_size', 'http_chunk_size'), ('buffer_size', 'buffersize'), ('rate_limit', 'ratelimit')):
+        size = parse_byte_size(tuning.get(key))
+        if size:
+            ydl_opts[opt] = size
+    downloader = tuning.get('external_downloader')
+    if downloader:
+        # HLS/DASH는 yt-dlp 내장 조각 다운로더가 더 안정적이라 일반 http(s)만 넘긴다.
+        ydl_opts['external_downloader'] = {'default': 'native', 'http': downloader}
+        if downloader == 'aria2c':
+            connections = str(tuning.get('concurrent_fragments') or 1)
+            ydl_opts['external_downloader_args'] = {
+                'aria2c': ['-x', connections, '-s', connections, '-k', '1M'],
+            }
+    return ydl_opts
+
 def can_write_to_directory(path):
     if not path or not os.path.isdir(path):
         return False
@@ -358,6 +1081,41 @@ def pick_folder_via_osascript():
         return normalized
     return None
 
+def track_serving_path(path, delta):
+    with _serving_paths_lock:
+        count = _serving_paths.get(path, 0) + delta
+        if count > 0:
+            _serving_paths[path] = count
+        else:
+            _serving_paths.pop(path, None)
+
+def start_serving_path(path):
+    """
+    Mark `path` as being sent. The record goes to the shared media index so the janitor of
+    every gunicorn worker skips it, not only this process's. Returns the id for finish_serving_path.
+    """
+    track_serving_path(path, 1)
+    serving_id = uuid.uuid4().hex
+    if MEDIA_INDEX_ENABLED:
+        try:
+            with closing(connect_media_index()) as conn, conn:
+                conn.execute(
+                    'INSERT INTO media_serving (serving_id, path, started_at) VALUES (?, ?, ?)',
+                    (serving_id, path, time.time()),
+                )
+        except Exception as e:
+            logger.warning(f"Failed to record serving {path}: {e}")
+    return serving_id
+
+def finish_serving_path(path, serving_id):
+    track_serving_path(path, -1)
+    if MEDIA_INDEX_ENABLED:
+        try:
+            with closing(connect_media_index()) as conn, conn:
+                conn.execute('DELETE FROM media_serving WHERE serving_id = ?', (serving_id,))
+        except Exception as e:
+            logger.warning(f"Failed to clear serving record {path}: {e}")
+
 def find_file_path(filename):
     search_dirs = [get_download_dir(), DEFAULT_DOWNLOAD_DIR]
     for directory in search_dirs:
@@ -366,13 +1124,125 @@ def find_file_path(filename):
             return file_path
     return None
 
+class MemoryTokenStore:
+    """Per-process /api/files token registry. Only safe with a single server process."""
+
+    def __init__(self):
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def put(self, token, payload):
+        with self._lock:
+            self._tokens[token] = payload
+
+    def get(self, token):
+        with self._lock:
+            payload = self._tokens.get(token)
+            return dict(payload) if payload else None
+
+    def delete(self, token):
+        with self._lock:
+            self._tokens.pop(token, None)
+
+    def sweep(self, max_age):
+        cutoff = time.time() - max_age
+        with self._lock:
+            expired = [token for token, payload in self._tokens.items() if payload['created_at'] < cutoff]
+            for token in expired:
+                self._tokens.pop(token, None)
+        return len(expired)
+
+    def live_paths(self, max_age):
+        cutoff = time.time() - max_age
+        with self._lock:
+            return {payload['path'] for payload in self._tokens.values() if payload['created_at'] >= cutoff}
+
+    def count(self):
+        with self._lock:
+            return len(self._tokens)
+
+class SqliteTokenStore:
+    """Token registry in a SQLite file, shared by every server process on the host."""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS download_tokens ('
+                'token TEXT PRIMARY KEY, path TEXT NOT NULL, filename TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS download_tokens_created_at ON download_tokens (created_at)')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def put(self, token, payload):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO download_tokens (token, path, filename, created_at) VALUES (?, ?, ?, ?)',
+                (token, payload['path'], payload['filename'], payload['created_at']),
+            )
+
+    def get(self, token):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT path, filename, created_at FROM download_tokens WHERE token = ?', (token,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, token):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM download_tokens WHERE token = ?', (token,))
+
+    def sweep(self, max_age):
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute('DELETE FROM download_tokens WHERE created_at < ?', (time.time() - max_age,))
+            return cursor.rowcount
+
+    def live_paths(self, max_age):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT DISTINCT path FROM download_tokens WHERE created_at >= ?', (time.time() - max_age,)
+            ).fetchall()
+        return {row['path'] for row in rows}
+
+    def count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM download_tokens').fetchone()[0]
+
+def create_download_token_store():
+    if DOWNLOAD_TOKEN_STORE == 'sqlite':
+        try:
+            return SqliteTokenStore(DOWNLOAD_TOKEN_DB_FILE)
+        except Exception as e:
+            logger.warning(f"Falling back to in-memory download tokens, failed to open {DOWNLOAD_TOKEN_DB_FILE}: {e}")
+    return MemoryTokenStore()
+
+with startup_phase('token_store'):
+    _download_file_cache = create_download_token_store()
+
 def register_download_file(file_token, file_path, filename):
-    _download_file_cache[file_token] = {
+    global _download_token_puts
+    _download_file_cache.put(file_token, {
         'path': file_path,
         'filename': filename,
         'created_at': time.time(),
-    }
+    })
     debug_log("registered token=%s file=%s", file_token, file_path)
+    with _download_token_puts_lock:
+        _download_token_puts += 1
+        due = _download_token_puts % DOWNLOAD_TOKEN_SWEEP_EVERY == 0
+    if due:
+        try:
+            swept = _download_file_cache.sweep(DOWNLOAD_LINK_TTL_SECONDS)
+            if swept:
+                debug_log("swept expired tokens count=%s", swept)
+        except Exception as e:
+            logger.warning(f"Failed to sweep expired download tokens: {e}")
 
 def resolve_download_file(file_token):
     payload = _download_file_cache.get(file_token)
@@ -382,37 +1252,463 @@ def resolve_download_file(file_token):
 
     age = time.time() - payload.get('created_at', 0)
     if age > DOWNLOAD_LINK_TTL_SECONDS:
-        _download_file_cache.pop(file_token, None)
+        _download_file_cache.delete(file_token)
         debug_log("token expired token=%s age=%.2fs", file_token, age)
         return None
 
     file_path = payload.get('path')
     if not file_path or not os.path.exists(file_path):
-        _download_file_cache.pop(file_token, None)
+        _download_file_cache.delete(file_token)
         debug_log("token stale token=%s path=%s", file_token, file_path)
         return None
     debug_log("token hit token=%s path=%s", file_token, file_path)
     return payload
 
-os.makedirs(DEFAULT_DOWNLOAD_DIR, exist_ok=True)
-get_download_dir()
+def connect_media_index():
+    conn = sqlite3.connect(MEDIA_INDEX_DB_FILE, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
 
-# 파일을 주기적으로 정리하는 함수
-def cleanup_old_files():
-    current_time = time.time()
+def init_media_index():
     try:
-        # 사용자 지정 다운로드 경로는 보존하고, 임시 기본 경로만 정리
-        for file in os.listdir(DEFAULT_DOWNLOAD_DIR):
-            file_path = os.path.join(DEFAULT_DOWNLOAD_DIR, file)
-            # 1시간(3600초) 이상 지난 파일 삭제
-            if os.path.isfile(file_path) and current_time - os.path.getmtime(file_path) > 3600:
-                try:
-                    os.remove(file_path)
-                    logger.info(f"Removed old file: {file}")
-                except Exception as e:
-                    logger.error(f"Error removing file {file}: {e}")
+        os.makedirs(os.path.dirname(MEDIA_INDEX_DB_FILE), exist_ok=True)
+        with closing(connect_media_index()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS media (
+                    extractor TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    format_selector TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    title TEXT,
+                    size INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed_at REAL NOT NULL,
+                    PRIMARY KEY (extractor, video_id, format_selector)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS media_serving (
+                    serving_id TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    started_at REAL NOT NULL
+                )
+                """
+            )
+        return True
+    except Exception as e:
+        logger.warning(f"Media index disabled, failed to open {MEDIA_INDEX_DB_FILE}: {e}")
+        return False
+
+def build_media_key(platform, video_url):
+    """
+    (extractor, video id) for a cleaned URL, worked out offline from the extractor's URL pattern.
+    URLs the platform extractor does not match fall back to the URL itself.
+    """
+    ie_key = PLATFORM_EXTRACTOR_KEYS.get(platform)
+    if ie_key:
+        try:
+            ie = yt_dlp.extractor.get_info_extractor(ie_key)
+            if ie.suitable(video_url):
+                video_id = ie.get_temp_id(video_url)
+                if video_id:
+                    return ie_key, str(video_id)
+        except Exception as e:
+            debug_log("media key fallback platform=%s url=%s err=%s", platform, video_url, str(e))
+    return 'url', video_url
+
+def compute_file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def lookup_stored_media(media_key, format_selector):
+    """Return the stored file row for this media, dropping the entry if the file is gone."""
+    if not MEDIA_INDEX_ENABLED:
+        return None
+    extractor, video_id = media_key
+    try:
+        with closing(connect_media_index()) as conn, conn:
+            row = conn.execute(
+                'SELECT * FROM media WHERE extractor = ? AND video_id = ? AND format_selector = ?',
+                (extractor, video_id, format_selector),
+            ).fetchone()
+            if not row:
+                return None
+            try:
+                intact = os.path.getsize(row['path']) == row['size']
+            except OSError:
+                intact = False
+            if not intact:
+                conn.execute(
+                    'DELETE FROM media WHERE extractor = ? AND video_id = ? AND format_selector = ?',
+                    (extractor, video_id, format_selector),
+                )
+                debug_log("media index stale key=%s path=%s", media_key, row['path'])
+                return None
+            conn.execute(
+                'UPDATE media SET last_accessed_at = ? WHERE extractor = ? AND video_id = ? AND format_selector = ?',
+                (time.time(), extractor, video_id, format_selector),
+            )
+            return dict(row)
+    except Exception as e:
+        logger.warning(f"Media index lookup failed: {e}")
+        return None
+
+def store_media(media_key, format_selector, path, filename, title):
+    if not MEDIA_INDEX_ENABLED:
+        return
+    extractor, video_id = media_key
+    try:
+        size = os.path.getsize(path)
+        sha256 = compute_file_sha256(path)
+        now = time.time()
+        with closing(connect_media_index()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO media '
+                '(extractor, video_id, format_selector, path, filename, title, size, sha256, created_at, last_accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (extractor, video_id, format_selector, path, filename, title, size, sha256, now, now),
+            )
+        debug_log("media index stored key=%s path=%s size=%s", media_key, path, size)
+    except Exception as e:
+        logger.warning(f"Failed to record {path} in media index: {e}")
+
+with startup_phase('download_dirs'):
+    os.makedirs(DEFAULT_DOWNLOAD_DIR, exist_ok=True)
+    get_download_dir()
+with startup_phase('media_index'):
+    MEDIA_INDEX_ENABLED = MEDIA_INDEX_ENABLED and init_media_index()
+
+def connect_job_journal():
+    conn = sqlite3.connect(JOB_JOURNAL_DB_FILE, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_job_journal():
+    try:
+        os.makedirs(os.path.dirname(JOB_JOURNAL_DB_FILE), exist_ok=True)
+        with closing(connect_job_journal()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_journal (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    owner TEXT NOT NULL,
+                    data TEXT,
+                    recorded_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS job_journal_job ON job_journal (job_id, seq)')
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS journal_owners (
+                    owner TEXT PRIMARY KEY,
+                    heartbeat_at REAL NOT NULL
+                )
+                """
+            )
+        return True
+    except Exception as e:
+        logger.warning(f"Job journal disabled, failed to open {JOB_JOURNAL_DB_FILE}: {e}")
+        return False
+
+def journal_job_event(job_id, state, data=None):
+    """Append one state change of a download job; the journal is never updated in place."""
+    if not JOB_JOURNAL_ENABLED:
+        return
+    try:
+        with closing(connect_job_journal()) as conn, conn:
+            conn.execute(
+                'INSERT INTO job_journal (job_id, state, owner, data, recorded_at) VALUES (?, ?, ?, ?, ?)',
+                (job_id, state, _journal_owner, json.dumps(data, ensure_ascii=False) if data is not None else None, time.time()),
+            )
+    except Exception as e:
+        logger.warning(f"Failed to journal job {job_id} state={state}: {e}")
+
+def load_journaled_jobs():
+    """Latest journal row of every job, with the params it was queued with."""
+    with closing(connect_job_journal()) as conn:
+        rows = conn.execute(
+            """
+            SELECT last.seq, last.job_id, last.state, last.owner, last.data, last.recorded_at,
+                   queued.data AS queued_data, queued.recorded_at AS created_at
+            FROM job_journal AS last
+            JOIN (SELECT job_id, MAX(seq) AS seq FROM job_journal GROUP BY job_id) AS latest
+              ON latest.seq = last.seq
+            JOIN job_journal AS queued
+              ON queued.job_id = last.job_id AND queued.state = 'queued'
+            ORDER BY queued.seq
+            """
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def load_orphaned_journaled_jobs():
+    """
+    Like load_journaled_jobs, but only unfinished jobs whose owner's lease has lapsed. The
+    heartbeat runs this every JOB_JOURNAL_HEARTBEAT_SECONDS, so finished jobs and jobs of live
+    owners are filtered in SQL instead of being loaded and parsed.
+    """
+    placeholders = ', '.join('?' for _ in JOB_JOURNAL_UNFINISHED_STATES)
+    with closing(connect_job_journal()) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT last.seq, last.job_id, last.state, last.owner, last.data, last.recorded_at,
+                   queued.data AS queued_data, queued.recorded_at AS created_at
+            FROM job_journal AS last
+            JOIN job_journal AS queued
+              ON queued.job_id = last.job_id AND queued.state = 'queued'
+            WHERE last.state IN ({placeholders})
+              AND last.owner != ?
+              AND last.owner NOT IN (SELECT owner FROM journal_owners WHERE heartbeat_at >= ?)
+              AND last.seq = (SELECT MAX(seq) FROM job_journal WHERE job_id = last.job_id)
+            ORDER BY queued.seq
+            """,
+            (*JOB_JOURNAL_UNFINISHED_STATES, _journal_owner, time.time() - JOB_JOURNAL_LEASE_SECONDS),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def renew_journal_lease():
+    """Record that this process is still alive; other workers treat its jobs as theirs to resume once this lapses."""
+    if not JOB_JOURNAL_ENABLED:
+        return
+    try:
+        with closing(connect_job_journal()) as conn, conn:
+            conn.execute(
+                '''
+                INSERT INTO journal_owners (owner, heartbeat_at) VALUES (?, ?)
+                ON CONFLICT(owner) DO UPDATE SET heartbeat_at = excluded.heartbeat_at
+                ''',
+                (_journal_owner, time.time()),
+            )
+    except Exception as e:
+        logger.warning(f"Failed to renew job journal lease: {e}")
+
+def load_journal_leases():
+    with closing(connect_job_journal()) as conn:
+        return dict(conn.execute('SELECT owner, heartbeat_at FROM journal_owners').fetchall())
+
+def is_journal_owner_alive(owner, leases):
+    """An owner is alive while its heartbeat is younger than JOB_JOURNAL_LEASE_SECONDS; owners without one are dead."""
+    if owner == _journal_owner:
+        return True
+    return leases.get(owner, 0) >= time.time() - JOB_JOURNAL_LEASE_SECONDS
+
+def claim_journaled_job(job_id, seq):
+    """Take over an unfinished job unless another worker already did (its latest row is no longer `seq`)."""
+    with closing(connect_job_journal()) as conn:
+        conn.isolation_level = None
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            latest = conn.execute('SELECT MAX(seq) FROM job_journal WHERE job_id = ?', (job_id,)).fetchone()[0]
+            if latest != seq:
+                conn.execute('ROLLBACK')
+                return False
+            conn.execute(
+                'INSERT INTO job_journal (job_id, state, owner, data, recorded_at) VALUES (?, ?, ?, NULL, ?)',
+                (job_id, 'resumed', _journal_owner, time.time()),
+            )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+def get_journaled_partial_prefixes():
+    """
+    file_ids of unfinished journaled jobs; their .part files are resumable, not orphans. Jobs of
+    owners whose lease lapsed are taken over by the heartbeat, so none stay unfinished for good.
+    """
+    if not JOB_JOURNAL_ENABLED:
+        return set()
+    prefixes = set()
+    for row in load_journaled_jobs():
+        if row['state'] in JOB_JOURNAL_UNFINISHED_STATES:
+            file_id = (json.loads(row['queued_data'] or '{}').get('params') or {}).get('file_id')
+            if file_id:
+                prefixes.add(file_id)
+    return prefixes
+
+def compact_job_journal():
+    """Drop the history of jobs that finished longer ago than DOWNLOAD_JOB_RETENTION_SECONDS."""
+    if not JOB_JOURNAL_ENABLED:
+        return 0
+    cutoff = time.time() - DOWNLOAD_JOB_RETENTION_SECONDS
+    with closing(connect_job_journal()) as conn, conn:
+        cursor = conn.execute(
+            """
+            DELETE FROM job_journal WHERE job_id IN (
+                SELECT last.job_id FROM job_journal AS last
+                JOIN (SELECT job_id, MAX(seq) AS seq FROM job_journal GROUP BY job_id) AS latest
+                  ON latest.seq = last.seq
+                WHERE last.state IN ('completed', 'failed') AND last.recorded_at < ?
+            )
+            """,
+            (cutoff,),
+        )
+        conn.execute('DELETE FROM journal_owners WHERE heartbeat_at < ?', (cutoff,))
+        return cursor.rowcount
+
+with startup_phase('job_journal'):
+    JOB_JOURNAL_ENABLED = JOB_JOURNAL_ENABLED and init_job_journal()
+
+def connect_thumbnail_index():
+    conn = sqlite3.connect(THUMBNAIL_DB_FILE, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_thumbnail_index():
+    try:
+        os.makedirs(os.path.dirname(THUMBNAIL_DB_FILE), exist_ok=True)
+        with closing(connect_thumbnail_index()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS thumbnails (
+                    id TEXT PRIMARY KEY,
+                    platform TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    registered_at REAL NOT NULL,
+                    path TEXT,
+                    size INTEGER,
+                    last_accessed_at REAL
+                )
+                """
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS thumbnails_last_accessed ON thumbnails (last_accessed_at)')
+        return True
     except Exception as e:
-        logger.error(f"Error during cleanup: {e}")
+        logger.warning(f"Thumbnail proxy disabled, failed to open {THUMBNAIL_DB_FILE}: {e}")
+        return False
+
+with startup_phase('thumbnail_index'):
+    THUMBNAIL_INDEX_ENABLED = THUMBNAIL_INDEX_ENABLED and init_thumbnail_index()
+
+def get_protected_paths():
+    """
+    Files that must not be evicted: referenced by a live /api/files token or being sent right
+    now by any worker. Serving records left behind by a dead worker are dropped after
+    STORAGE_SERVING_MAX_AGE_SECONDS.
+    """
+    protected = _download_file_cache.live_paths(DOWNLOAD_LINK_TTL_SECONDS)
+    with _serving_paths_lock:
+        protected.update(path for path, count in _serving_paths.items() if count > 0)
+    if MEDIA_INDEX_ENABLED:
+        with closing(connect_media_index()) as conn, conn:
+            conn.execute(
+                'DELETE FROM media_serving WHERE started_at < ?',
+                (time.time() - STORAGE_SERVING_MAX_AGE_SECONDS,),
+            )
+            protected.update(row['path'] for row in conn.execute('SELECT path FROM media_serving').fetchall())
+    return protected
+
+def enforce_storage_limits():
+    """
+    Evict least recently used media from DEFAULT_DOWNLOAD_DIR until it fits the byte quota
+    and the disk has the minimum free space. User-chosen download folders are never touched.
+    """
+    if not MEDIA_INDEX_ENABLED:
+        return
+    managed_dir = normalize_download_dir(DEFAULT_DOWNLOAD_DIR)
+    with closing(connect_media_index()) as conn:
+        rows = [
+            dict(row) for row in conn.execute(
+                'SELECT extractor, video_id, format_selector, path, size FROM media ORDER BY last_accessed_at ASC'
+            ).fetchall()
+            if os.path.dirname(row['path']) == managed_dir
+        ]
+    used_bytes = sum(row['size'] for row in rows)
+    free_bytes = shutil.disk_usage(managed_dir).free
+    with _storage_stats_lock:
+        _storage_stats.update(used_bytes=used_bytes, free_bytes=free_bytes, managed_files=len(rows))
+    if used_bytes <= STORAGE_QUOTA_BYTES and free_bytes >= STORAGE_MIN_FREE_BYTES:
+        return
+
+    protected = get_protected_paths()
+    for row in rows:
+        if used_bytes <= STORAGE_QUOTA_BYTES and free_bytes >= STORAGE_MIN_FREE_BYTES:
+            break
+        if row['path'] in protected:
+            continue
+        try:
+            os.remove(row['path'])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error evicting file {row['path']}: {e}")
+            continue
+        with closing(connect_media_index()) as conn, conn:
+            conn.execute(
+                'DELETE FROM media WHERE extractor = ? AND video_id = ? AND format_selector = ?',
+                (row['extractor'], row['video_id'], row['format_selector']),
+            )
+        used_bytes -= row['size']
+        free_bytes += row['size']
+        with _storage_stats_lock:
+            _storage_stats['evicted_files'] += 1
+            _storage_stats['evicted_bytes'] += row['size']
+        logger.info(f"Evicted file: {os.path.basename(row['path'])} ({row['size']} bytes)")
+    with _storage_stats_lock:
+        _storage_stats.update(used_bytes=used_bytes, free_bytes=free_bytes)
+
+def remove_orphan_files():
+    """
+    Delete old files in DEFAULT_DOWNLOAD_DIR that the media index does not track
+    (leftover .part fragments, renamed copies). Runs on the janitor thread only.
+    """
+    indexed = set()
+    if MEDIA_INDEX_ENABLED:
+        with closing(connect_media_index()) as conn:
+            indexed = {row['path'] for row in conn.execute('SELECT path FROM media').fetchall()}
+    protected = get_protected_paths() | indexed
+    resumable = tuple(get_journaled_partial_prefixes())
+    cutoff = time.time() - STORAGE_ORPHAN_MAX_AGE_SECONDS
+    with os.scandir(DEFAULT_DOWNLOAD_DIR) as entries:
+        for entry in entries:
+            if entry.path in protected or not entry.is_file() or entry.stat().st_mtime > cutoff:
+                continue
+            if resumable and entry.name.startswith(resumable):
+                continue
+            try:
+                os.remove(entry.path)
+                with _storage_stats_lock:
+                    _storage_stats['orphans_removed'] += 1
+                logger.info(f"Removed old file: {entry.name}")
+            except Exception as e:
+                logger.error(f"Error removing file {entry.name}: {e}")
+
+def run_storage_janitor():
+    last_orphan_sweep = 0.0
+    while True:
+        try:
+            swept = _download_file_cache.sweep(DOWNLOAD_LINK_TTL_SECONDS)
+            if swept:
+                debug_log("swept expired tokens count=%s", swept)
+            enforce_storage_limits()
+            if time.time() - last_orphan_sweep >= STORAGE_ORPHAN_SWEEP_INTERVAL_SECONDS:
+                remove_orphan_files()
+                compact_job_journal()
+                last_orphan_sweep = time.time()
+            with _storage_stats_lock:
+                _storage_stats['last_run_at'] = time.time()
+        except Exception as e:
+            logger.error(f"Error during storage cleanup: {e}")
+        time.sleep(STORAGE_JANITOR_INTERVAL_SECONDS)
+
+def start_storage_janitor():
+    global _storage_janitor_started
+    if _storage_janitor_started or not STORAGE_JANITOR_ENABLED:
+        return
+    _storage_janitor_started = True
+    threading.Thread(target=run_storage_janitor, name='bava-storage-janitor', daemon=True).start()
 
 # URL 유효성 검증
 def is_valid_url(url, platform):
@@ -420,13 +1716,32 @@ def is_valid_url(url, platform):
     if platform == 'youtube':
         return bool(parsed_url.netloc in ['www.youtube.com', 'youtube.com', 'm.youtube.com', 'music.youtube.com', 'youtu.be'])
     elif platform == 'tiktok':
-        return bool(parsed_url.netloc in ['www.tiktok.com', 'tiktok.com', 'vm.tiktok.com'])
+        return bool(parsed_url.netloc in ['www.tiktok.com', 'tiktok.com', 'vm.tiktok.com', 'vt.tiktok.com'])
     elif platform == 'instagram':
         return bool(parsed_url.netloc in ['www.instagram.com', 'instagram.com'])
     elif platform == 'facebook':
         return bool(parsed_url.netloc in ['www.facebook.com', 'facebook.com', 'fb.com', 'fb.watch', 'm.facebook.com'])
     return False
 
+def parse_url_items(data):
+    """
+    Validate the `urls`/`url` of a batch or bulk request. Items are strings (using the request's
+    platform) or {"url", "platform"} objects. Returns (items, error).
+    """
+    default_platform = data.get('platform', 'youtube')
+    raw_items = data.get('urls') or ([data['url']] if data.get('url') else [])
+    if not isinstance(raw_items, list) or not raw_items:
+        return None, 'URL이 제공되지 않았습니다'
+
+    items = []
+    for raw in raw_items:
+        item_url = raw.get('url') if isinstance(raw, dict) else raw
+        item_platform = (raw.get('platform') if isinstance(raw, dict) else None) or default_platform
+        if not item_url or not isinstance(item_url, str) or not is_valid_url(item_url.strip(), item_platform):
+            return None, f'유효한 {item_platform} URL이 아닙니다: {item_url}'
+        items.append({'url': item_url.strip(), 'platform': item_platform})
+    return items, None
+
 def clean_instagram_url(url):
     """인스타그램 URL을 정리하고 작동하는 형식으로 변환"""
     parsed_url = urlparse(url)
@@ -456,14 +1771,17 @@ def clean_facebook_url(url):
     
     # fb.watch 형식 처리
     if parsed_url.netloc == 'fb.watch':
-        # fb.watch는 단축 URL이므로 그대로 사용
+        # 단축 URL 해석(resolve_short_link)에 실패한 fb.watch는 yt-dlp가 리다이렉트를 따라가도록 그대로 사용
         return url
     
     # 쿼리 파라미터에서 비디오 ID 추출 시도
     path = parsed_url.path
     
-    # 일반적인 비디오 URL 패턴 (/watch/?v=...)
+    # 일반적인 비디오 URL 패턴 (/watch/?v=...): 공유용 파라미터(ref 등)는 버리고 v만 남긴다
     if '/watch/' in path or '/watch' in path:
+        video_id = re.search(r'(?:^|&)v=(\d+)', parsed_url.query or '')
+        if video_id:
+            return f"https://www.facebook.com/watch/?v={video_id.group(1)}"
         return url  # 이미 적절한 형식
     
     # 비디오 경로가 포함된 URL (/videos/...)
@@ -473,6 +1791,99 @@ def clean_facebook_url(url):
     # 기타 페이스북 게시물의 경우 원본 URL 사용
     return url
 
+def clean_tiktok_url(url):
+    """Drop tracking query parameters from TikTok video/photo URLs."""
+    parsed_url = urlparse(url)
+    if parsed_url.netloc in ('www.tiktok.com', 'tiktok.com') and re.search(r'/(video|photo)/\d+', parsed_url.path):
+        return f"https://www.tiktok.com{parsed_url.path.rstrip('/')}"
+    return url
+
+def get_cached_short_link(url):
+    with _short_link_cache_lock:
+        entry = _short_link_cache.get(url)
+        if entry is None:
+            _short_link_cache_stats['misses'] += 1
+            return None
+        if time.time() - entry['stored_at'] > SHORT_LINK_CACHE_TTL_SECONDS:
+            _short_link_cache.pop(url, None)
+            _short_link_cache_stats['expired'] += 1
+            _short_link_cache_stats['misses'] += 1
+            return None
+        _short_link_cache.move_to_end(url)
+        _short_link_cache_stats['hits'] += 1
+        return entry['url']
+
+def store_cached_short_link(url, resolved_url):
+    if SHORT_LINK_CACHE_MAX_ENTRIES <= 0:
+        return
+    with _short_link_cache_lock:
+        _short_link_cache[url] = {'url': resolved_url, 'stored_at': time.time()}
+        _short_link_cache.move_to_end(url)
+        while len(_short_link_cache) > SHORT_LINK_CACHE_MAX_ENTRIES:
+            _short_link_cache.popitem(last=False)
+            _short_link_cache_stats['evictions'] += 1
+
+def is_canonical_video_url(url, platform):
+    parsed_url = urlparse(url)
+    if not is_valid_url(url, platform):
+        return False
+    return any(
+        path_pattern.match(parsed_url.path) and (query_pattern is None or query_pattern.search(parsed_url.query or ''))
+        for path_pattern, query_pattern in SHORT_LINK_CANONICAL_PATTERNS.get(platform, ())
+    )
+
+def resolve_short_link(url, platform, cached_only=False):
+    """
+    Follow a short link (vm.tiktok.com, fb.watch) to the URL it redirects to, once per TTL.
+    Returns the input unchanged for other URLs, or when resolution fails or does not land on a
+    canonical video URL (login walls, home page); yt-dlp then follows the redirect itself as before.
+    With `cached_only` a cache miss also returns the input instead of going to the network.
+    """
+    parsed_url = urlparse(url)
+    if parsed_url.netloc not in SHORT_LINK_HOSTS.get(platform, ()):
+        return url
+    key = f"https://{parsed_url.netloc}{parsed_url.path.rstrip('/')}/"
+    resolved_url = get_cached_short_link(key)
+    if resolved_url:
+        return resolved_url
+    if cached_only:
+        return url
+    try:
+        with requests.get(
+            key,
+            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'},
+            allow_redirects=True,
+            stream=True,
+            timeout=SHORT_LINK_RESOLVE_TIMEOUT_SECONDS,
+        ) as response:
+            resolved_url = response.url
+    except Exception as e:
+        with _short_link_cache_lock:
+            _short_link_cache_stats['failures'] += 1
+        debug_log("short link resolve failed url=%s err=%s", url, str(e))
+        return url
+    if not is_canonical_video_url(resolved_url, platform):
+        # 로그인/차단 페이지나 홈으로 튕긴 경우는 캐시하지 않는다.
+        with _short_link_cache_lock:
+            _short_link_cache_stats['failures'] += 1
+        debug_log("short link left platform url=%s resolved=%s", url, resolved_url)
+        return url
+    store_cached_short_link(key, resolved_url)
+    debug_log("short link resolved url=%s resolved=%s", url, resolved_url)
+    return resolved_url
+
+def clean_platform_url(url, platform, cached_only=False):
+    url = resolve_short_link(url, platform, cached_only)
+    if platform == 'tiktok':
+        return clean_tiktok_url(url)
+    if platform == 'instagram':
+        return clean_instagram_url(url)
+    if platform == 'youtube':
+        return normalize_youtube_url(url)
+    if platform == 'facebook':
+        return clean_facebook_url(url)
+    return url
+
 def normalize_youtube_url(url):
     parsed = urlparse(url)
     host = (parsed.netloc or '').lower()
@@ -495,6 +1906,115 @@ def normalize_youtube_url(url):
         return f"https://www.youtube.com/watch?v={video_id}"
     return url
 
+def get_cached_extraction(platform, url):
+    """
+    Return a private copy of a cached extract_info() result, or None.
+    Copies are handed out because process_ie_result() mutates the dict it is given.
+    """
+    key = (platform, url)
+    with _extract_cache_lock:
+        entry = _extract_cache.get(key)
+        if entry is None:
+            _extract_cache_stats['misses'] += 1
+            return None
+        if time.time() - entry['stored_at'] > EXTRACT_CACHE_TTL_SECONDS:
+            _extract_cache.pop(key, None)
+            _extract_cache_stats['expired'] += 1
+            _extract_cache_stats['misses'] += 1
+            return None
+        _extract_cache.move_to_end(key)
+        _extract_cache_stats['hits'] += 1
+        info = entry['info']
+    debug_log("extract cache hit platform=%s url=%s", platform, url)
+    return copy.deepcopy(info)
+
+def store_cached_extraction(platform, url, info):
+    if EXTRACT_CACHE_MAX_ENTRIES <= 0 or not isinstance(info, dict):
+        return
+    # Flat (listing-only) results carry no formats and cannot be downloaded from.
+    if not info.get('formats') and not info.get('url'):
+        return
+    sanitized = yt_dlp.YoutubeDL.sanitize_info(info)
+    with _extract_cache_lock:
+        _extract_cache[(platform, url)] = {'info': sanitized, 'stored_at': time.time()}
+        _extract_cache.move_to_end((platform, url))
+        while len(_extract_cache) > EXTRACT_CACHE_MAX_ENTRIES:
+            _extract_cache.popitem(last=False)
+            _extract_cache_stats['evictions'] += 1
+
+def invalidate_cached_extraction(platform, url):
+    with _extract_cache_lock:
+        _extract_cache.pop((platform, url), None)
+
+def extract_video_info(video_url, platform, app_url='', rate_limit_wait=RATE_LIMIT_INFO_MAX_WAIT_SECONDS):
+    """
+    Extract the preview metadata /api/video-info returns for one URL.
+    `thumbnail` points at this app's /api/thumbnails proxy; the CDN URL stays in `thumbnail_source`.
+    Raises MediaDownloadError when nothing usable comes back.
+    """
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'nocheckcertificate': True,
+        'ignoreerrors': True,
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        }
+    }
+
+    # 플랫폼별 특화 옵션 추가
+    video_url = clean_platform_url(video_url, platform)
+    if platform == 'instagram':
+        ydl_opts.update({
+            'extract_flat': True,  # 플레이리스트 정보만 추출
+        })
+    elif platform == 'facebook':
+        ydl_opts.update({
+            'extract_flat': False,  # 페이스북은 상세 정보 추출 필요
+            'force_generic_extractor': False,  # 페이스북 전용 추출기 사용
+        })
+
+    info = get_cached_extraction(platform, video_url)
+    if info is None:
+        acquire_rate_limit(platform, 'extract', max_wait=rate_limit_wait)
+        extract_started_at = time.time()
+        with pooled_youtube_dl(ydl_opts, platform) as ydl:
+            info = ydl.extract_info(video_url, download=False)
+        metric_observe('bava_extraction_seconds', time.time() - extract_started_at, platform=platform, attempt='video-info')
+        if not info:
+            raise MediaDownloadError('동영상 정보를 가져올 수 없습니다. 비공개/제한 콘텐츠일 수 있습니다.', 400)
+        if isinstance(info, dict) and info.get('entries'):
+            entries = [entry for entry in info.get('entries', []) if entry]
+            if not entries:
+                raise MediaDownloadError('동영상 정보를 가져올 수 없습니다. 비공개/제한 콘텐츠일 수 있습니다.', 400)
+            info = entries[0]
+        store_cached_extraction(platform, video_url, info)
+
+    # 동영상 정보 추출
+    thumbnail_id = register_thumbnail(platform, info.get('id'), info.get('thumbnail'))
+    video_data = {
+        'id': info.get('id'),
+        'title': info.get('title'),
+        'duration': info.get('duration'),
+        'upload_date': info.get('upload_date'),
+        'thumbnail': f"{app_url}/api/thumbnails/{thumbnail_id}" if thumbnail_id else info.get('thumbnail'),
+        'thumbnail_source': info.get('thumbnail'),
+        'suggested_filename': sanitize_filename(info.get('title')),
+        'available_formats': []
+    }
+
+    # 사용 가능한 형식 정보
+    for format in info.get('formats', []):
+        if format.get('ext') in ['mp4', 'webm', 'mp3']:
+            video_data['available_formats'].append({
+                'format_id': format.get('format_id'),
+                'ext': format.get('ext'),
+                'resolution': format.get('resolution'),
+                'file_size': format.get('filesize')
+            })
+    return video_data
+
 @app.route('/api/video-info', methods=['POST'])
 def get_video_info():
     data = request.json
@@ -510,99 +2030,861 @@ def get_video_info():
         return jsonify({'error': f'유효한 {platform} URL이 아닙니다'}), 400
     
     try:
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'skip_download': True,
-            'nocheckcertificate': True,
-            'ignoreerrors': True,
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            }
-        }
-        
-        # 플랫폼별 특화 옵션 추가
-        if platform == 'instagram':
-            video_url = clean_instagram_url(video_url)
-            ydl_opts.update({
-                'extract_flat': True,  # 플레이리스트 정보만 추출
-            })
-        elif platform == 'youtube':
-            video_url = normalize_youtube_url(video_url)
-        elif platform == 'facebook':
-            video_url = clean_facebook_url(video_url)
-            ydl_opts.update({
-                'extract_flat': False,  # 페이스북은 상세 정보 추출 필요
-                'force_generic_extractor': False,  # 페이스북 전용 추출기 사용
-            })
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=False)
-            if not info:
-                return jsonify({'error': '동영상 정보를 가져올 수 없습니다. 비공개/제한 콘텐츠일 수 있습니다.'}), 400
-            if isinstance(info, dict) and info.get('entries'):
-                entries = [entry for entry in info.get('entries', []) if entry]
-                if not entries:
-                    return jsonify({'error': '동영상 정보를 가져올 수 없습니다. 비공개/제한 콘텐츠일 수 있습니다.'}), 400
-                info = entries[0]
-            
-            # 동영상 정보 추출
-            video_data = {
-                'id': info.get('id'),
-                'title': info.get('title'),
-                'duration': info.get('duration'),
-                'upload_date': info.get('upload_date'),
-                'thumbnail': info.get('thumbnail'),
-                'suggested_filename': sanitize_filename(info.get('title')),
-                'available_formats': []
-            }
-            
-            # 사용 가능한 형식 정보
-            for format in info.get('formats', []):
-                if format.get('ext') in ['mp4', 'webm', 'mp3']:
-                    video_data['available_formats'].append({
-                        'format_id': format.get('format_id'),
-                        'ext': format.get('ext'),
-                        'resolution': format.get('resolution'),
-                        'file_size': format.get('filesize')
-                    })
-            
-            return jsonify({'success': True, 'data': video_data})
-            
+        return jsonify({'success': True, 'data': extract_video_info(video_url, platform, request.url_root.rstrip('/'))})
+    except MediaDownloadError as e:
+        return jsonify({'error': e.message}), e.status_code
     except Exception as e:
         logger.error(f"Error extracting video info: {e}")
         return jsonify({'error': f'동영상 정보를 가져오는 중 오류가 발생했습니다: {str(e)}'}), 500
 
-@app.route('/api/download', methods=['POST'])
-def download_video():
-    data = request.json or {}
-    logger.info(f"Received download request: {data}")
-    
-    video_url = data.get('url')
-    format_code = data.get('format', 'best')  # 기본값 'best' 추가
-    quality = data.get('quality', 'best')
-    platform = data.get('platform', 'youtube')
-    custom_filename = data.get('filename', '')
-    
-    if not video_url:
-        return jsonify({'error': 'URL이 제공되지 않았습니다'}), 400
-    
-    if not is_valid_url(video_url, platform):
-        return jsonify({'error': f'유효한 {platform} URL이 아닙니다'}), 400
+def iter_video_info_entries(items):
+    """
+    Yield (index, url, platform) for every entry of the bulk request. Playlist/channel URLs
+    are listed with flat extraction, so no entry is fully extracted just to be listed.
+    """
+    seen = set()
+    for item in items:
+        platform = item['platform']
+        if looks_like_collection_url(item['url'], platform):
+            urls = list_collection_entry_urls(item['url'], platform, VIDEO_INFO_BULK_MAX_ITEMS - len(seen))
+        else:
+            urls = [item['url']]
+        for entry_url in urls:
+            if len(seen) >= VIDEO_INFO_BULK_MAX_ITEMS:
+                return
+            entry_url = clean_platform_url(entry_url, platform)
+            if entry_url in seen or not is_valid_url(entry_url, platform):
+                continue
+            seen.add(entry_url)
+            yield len(seen) - 1, entry_url, platform
+
+def resolve_bulk_video_info(index, entry_url, platform, app_url):
+    line = {'index': index, 'url': entry_url, 'platform': platform}
+    try:
+        line.update(success=True, data=extract_video_info(entry_url, platform, app_url, rate_limit_wait=RATE_LIMIT_MAX_WAIT_SECONDS))
+    except MediaDownloadError as e:
+        line.update(success=False, error=e.message, error_status=e.status_code)
+    except Exception as e:
+        logger.warning(f"Bulk video-info failed for {entry_url}: {e}")
+        line.update(success=False, error=f'동영상 정보를 가져오는 중 오류가 발생했습니다: {str(e)}', error_status=500)
+    return line
+
+def stream_bulk_video_info(items, app_url):
+    """
+    NDJSON body of /api/video-info/bulk: one line per entry in completion order (each carries its
+    listing index), then a summary line. At most VIDEO_INFO_BULK_MAX_WORKERS entries are in flight,
+    so listing a huge playlist never queues hundreds of extractions at once.
+    """
+    entries = iter_video_info_entries(items)
+    pending = set()
+    total = failed = 0
+    listing_done, listing_error = False, None
+    try:
+        while True:
+            while not listing_done and len(pending) < VIDEO_INFO_BULK_MAX_WORKERS:
+                try:
+                    entry = next(entries, None)
+                except Exception as e:
+                    logger.warning(f"Bulk video-info listing failed: {e}")
+                    entry, listing_error = None, e.message if isinstance(e, MediaDownloadError) else str(e)
+                if entry is None:
+                    listing_done = True
+                    break
+                pending.add(_video_info_executor.submit(resolve_bulk_video_info, *entry, app_url))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                line = future.result()
+                total += 1
+                failed += 0 if line['success'] else 1
+                yield json.dumps(line, ensure_ascii=False) + '\n'
+        summary = {'done': True, 'count': total, 'failed': failed}
+        if listing_error:
+            summary['error'] = listing_error
+        yield json.dumps(summary, ensure_ascii=False) + '\n'
+    finally:
+        # 클라이언트가 연결을 끊으면 아직 시작하지 않은 추출은 버린다.
+        for future in pending:
+            future.cancel()
+
+@app.route('/api/video-info/bulk', methods=['POST'])
+def get_bulk_video_info():
+    """
+    Preview metadata for many URLs and/or playlist/channel URLs, streamed as NDJSON
+    (application/x-ndjson) as each entry resolves. Items follow the /api/batches format.
+    """
+    data = request.json or {}
+    items, items_error = parse_url_items(data)
+    if items_error:
+        return jsonify({'error': items_error}), 400
+
+    return Response(
+        stream_bulk_video_info(items, request.url_root.rstrip('/')),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+def register_thumbnail(platform, video_id, thumbnail_url):
+    """
+    Remember where a video's thumbnail comes from and return its proxy id. The id is derived
+    from the video, not the (often signed, expiring) CDN URL, so re-extractions share one entry.
+    Returns None when the thumbnail index is unavailable; callers then hand out the CDN URL.
+    """
+    if not thumbnail_url or not THUMBNAIL_INDEX_ENABLED:
+        return None
+    thumbnail_id = hashlib.sha256(f"{platform}:{video_id or thumbnail_url}".encode('utf-8')).hexdigest()[:32]
+    try:
+        with closing(connect_thumbnail_index()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO thumbnails (id, platform, url, registered_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET url = excluded.url, registered_at = excluded.registered_at
+                """,
+                (thumbnail_id, platform, thumbnail_url, time.time()),
+            )
+    except Exception as e:
+        logger.warning(f"Failed to register thumbnail {thumbnail_id}: {e}")
+        return None
+    return thumbnail_id
+
+def find_thumbnail_file(thumbnail_id):
+    for ext in THUMBNAIL_EXTS.values():
+        path = os.path.join(THUMBNAIL_CACHE_DIR, f"{thumbnail_id}{ext}")
+        if os.path.isfile(path):
+            return path
+    return None
+
+def get_cached_thumbnail(thumbnail_id):
+    """
+    Path of the cached thumbnail, or None. The disk is checked too, so a file another worker
+    stored is found even if its index row was lost.
+    """
+    with closing(connect_thumbnail_index()) as conn, conn:
+        row = conn.execute('SELECT path FROM thumbnails WHERE id = ?', (thumbnail_id,)).fetchone()
+        path = row['path'] if row and row['path'] and os.path.isfile(row['path']) else find_thumbnail_file(thumbnail_id)
+        if path and row:
+            conn.execute(
+                'UPDATE thumbnails SET path = ?, size = ?, last_accessed_at = ? WHERE id = ?',
+                (path, os.path.getsize(path), time.time(), thumbnail_id),
+            )
+    with _thumbnail_stats_lock:
+        _thumbnail_cache_stats['hits' if path else 'misses'] += 1
+    return path
+
+def get_thumbnail_source(thumbnail_id):
+    with closing(connect_thumbnail_index()) as conn:
+        row = conn.execute('SELECT platform, url FROM thumbnails WHERE id = ?', (thumbnail_id,)).fetchone()
+    return dict(row) if row else None
+
+def store_thumbnail(thumbnail_id, content, ext):
+    """Save a fetched thumbnail and evict least recently used files beyond THUMBNAIL_CACHE_MAX_BYTES."""
+    os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+    path = os.path.join(THUMBNAIL_CACHE_DIR, f"{thumbnail_id}{ext}")
+    with tempfile.NamedTemporaryFile(dir=THUMBNAIL_CACHE_DIR, prefix='.bava_thumb_', delete=False) as f:
+        f.write(content)
+    os.replace(f.name, path)
+    now = time.time()
+    evicted_paths = []
+    with closing(connect_thumbnail_index()) as conn:
+        conn.isolation_level = None
+        # 여러 워커가 동시에 저장해도 용량 계산이 어긋나지 않도록 쓰기 잠금을 잡고 정리한다.
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'UPDATE thumbnails SET path = ?, size = ?, last_accessed_at = ? WHERE id = ?',
+                (path, len(content), now, thumbnail_id),
+            )
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM thumbnails WHERE path IS NOT NULL').fetchone()[0]
+            if total > THUMBNAIL_CACHE_MAX_BYTES:
+                for row in conn.execute(
+                    'SELECT id, path, size FROM thumbnails WHERE path IS NOT NULL AND id != ? ORDER BY last_accessed_at',
+                    (thumbnail_id,),
+                ).fetchall():
+                    if total <= THUMBNAIL_CACHE_MAX_BYTES:
+                        break
+                    conn.execute('UPDATE thumbnails SET path = NULL, size = NULL WHERE id = ?', (row['id'],))
+                    evicted_paths.append(row['path'])
+                    total -= row['size'] or 0
+            conn.execute(
+                'DELETE FROM thumbnails WHERE path IS NULL AND registered_at < ?',
+                (now - THUMBNAIL_SOURCE_TTL_SECONDS,),
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    for evicted_path in evicted_paths:
+        try:
+            os.remove(evicted_path)
+        except OSError:
+            pass
+    if evicted_paths:
+        with _thumbnail_stats_lock:
+            _thumbnail_cache_stats['evictions'] += len(evicted_paths)
+    return path
+
+def fetch_thumbnail(thumbnail_id, source):
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    }
+    with requests.get(source['url'], headers=headers, stream=True, timeout=(5, 15)) as response:
+        if response.status_code != 200:
+            raise MediaDownloadError(f'썸네일을 가져오지 못했습니다 (HTTP {response.status_code})', 502)
+        content_type = (response.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+        ext = THUMBNAIL_EXTS.get(content_type)
+        if not ext:
+            raise MediaDownloadError('썸네일 응답이 이미지가 아닙니다', 502)
+        chunks, size = [], 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > THUMBNAIL_MAX_BYTES:
+                raise MediaDownloadError('썸네일 파일이 너무 큽니다', 502)
+            chunks.append(chunk)
+    debug_log("thumbnail fetched id=%s platform=%s bytes=%s", thumbnail_id, source['platform'], size)
+    return store_thumbnail(thumbnail_id, b''.join(chunks), ext)
+
+@app.route('/api/thumbnails/<thumbnail_id>', methods=['GET'])
+def get_thumbnail(thumbnail_id):
+    """Serve a video thumbnail from the local cache, fetching it once from the CDN on a miss."""
+    if not THUMBNAIL_INDEX_ENABLED or not re.fullmatch(r'[0-9a-f]{32}', thumbnail_id):
+        return jsonify({'error': '썸네일을 찾을 수 없습니다'}), 404
+    path = get_cached_thumbnail(thumbnail_id)
+    if not path:
+        source = get_thumbnail_source(thumbnail_id)
+        if not source:
+            return jsonify({'error': '썸네일을 찾을 수 없습니다'}), 404
+        try:
+            # 같은 썸네일을 동시에 요청해도 CDN에는 한 번만 간다.
+            path, _ = run_single_flight(
+                ('thumbnail', thumbnail_id), lambda report_progress: fetch_thumbnail(thumbnail_id, source), lambda **fields: None,
+            )
+        except Exception as e:
+            with _thumbnail_stats_lock:
+                _thumbnail_cache_stats['failures'] += 1
+            logger.warning(f"Thumbnail fetch failed for {thumbnail_id}: {e}")
+            if isinstance(e, MediaDownloadError):
+                return jsonify({'error': e.message}), e.status_code
+            return jsonify({'error': '썸네일을 가져오지 못했습니다'}), 502
+    try:
+        return send_file(path, conditional=True, etag=True, max_age=THUMBNAIL_CACHE_MAX_AGE_SECONDS)
+    except FileNotFoundError:
+        # 응답 직전에 LRU에서 밀려났다.
+        return jsonify({'error': '썸네일을 찾을 수 없습니다'}), 404
+
+def build_progress_hooks(report_progress, platform='unknown'):
+    """
+    Translate yt-dlp progress/postprocessor callbacks into report_progress(**fields).
+    Byte updates are throttled; phase changes are always reported.
+    """
+    last_report = {'at': 0.0}
+    postprocess_started = {}
+
+    def progress_hook(d):
+        status = d.get('status')
+        if status == 'downloading':
+            now = time.time()
+            if now - last_report['at'] < DOWNLOAD_PROGRESS_MIN_INTERVAL_SECONDS:
+                return
+            last_report['at'] = now
+            report_progress(
+                phase='download',
+                downloaded_bytes=d.get('downloaded_bytes'),
+                total_bytes=d.get('total_bytes') or d.get('total_bytes_estimate'),
+                speed=d.get('speed'),
+                eta=d.get('eta'),
+            )
+        elif status == 'finished':
+            total = d.get('total_bytes') or d.get('downloaded_bytes')
+            metric_inc('bava_download_bytes_total', total or 0, platform=platform)
+            metric_observe('bava_download_seconds', d.get('elapsed'), platform=platform)
+            report_progress(phase='download', downloaded_bytes=total, total_bytes=total, speed=None, eta=0)
+
+    def postprocessor_hook(d):
+        postprocessor = str(d.get('postprocessor') or '')
+        if d.get('status') == 'finished' and postprocessor in postprocess_started:
+            elapsed = time.time() - postprocess_started.pop(postprocessor)
+            metric_observe('bava_postprocess_seconds', elapsed, postprocessor=postprocessor)
+        if d.get('status') != 'started':
+            return
+        postprocess_started[postprocessor] = time.time()
+        phase = 'move' if postprocessor == 'MoveFiles' else 'merge'
+        report_progress(phase=phase, postprocessor=postprocessor)
+
+    return [progress_hook], [postprocessor_hook]
+
+class CancellableLogger:
+    """
+    yt-dlp logger that aborts the owning extraction once cancel_event is set.
+    Extractors log before every network request, so losers stop at their next step.
+    """
+
+    def __init__(self, cancel_event):
+        self.cancel_event = cancel_event
+
+    def _check(self):
+        if self.cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled('extraction cancelled')
+
+    def debug(self, msg):
+        self._check()
+
+    def info(self, msg):
+        self._check()
+
+    def warning(self, msg):
+        self._check()
+
+    def error(self, msg):
+        debug_log("race extraction error: %s", msg)
+        self._check()
+
+def race_youtube_extractions(video_url, base_opts, attempts):
+    """
+    Extract metadata for several player_client strategies at once.
+    Returns (attempt, info) for the first one resolving to a media ext, or (None, None).
+    """
+    if not attempts:
+        return None, None
+
+    cancel_event = threading.Event()
+
+    def extract(attempt):
+        opts = dict(base_opts)
+        opts['format'] = attempt['format']
+        opts['logger'] = CancellableLogger(cancel_event)
+        if attempt.get('extractor_args'):
+            opts['extractor_args'] = attempt['extractor_args']
+        acquire_rate_limit('youtube', 'extract')
+        extract_started_at = time.time()
+        try:
+            with pooled_youtube_dl(opts, 'youtube') as ydl:
+                info = ydl.extract_info(video_url, download=False)
+            metric_observe('bava_extraction_seconds', time.time() - extract_started_at, platform='youtube', attempt=f"race:{attempt['label']}")
+        except yt_dlp.utils.DownloadError:
+            # 403은 클라이언트별로 다를 수 있어 여기서는 백오프하지 않는다(fetch_media가 전체 실패 후 판단).
+            raise
+        if isinstance(info, dict) and info.get('entries'):
+            entries = [entry for entry in info.get('entries', []) if entry]
+            info = entries[0] if entries else None
+        if not info:
+            return None
+        extractor_key = str(info.get('extractor_key') or '').lower()
+        if extractor_key and 'youtube' not in extractor_key:
+            return None
+        resolved_ext = str(info.get('ext') or '').lower().strip()
+        if resolved_ext and (resolved_ext in BLOCKED_EXTS or resolved_ext not in MEDIA_EXTS):
+            return None
+        return info
+
+    started_at = time.time()
+    executor = ThreadPoolExecutor(max_workers=len(attempts), thread_name_prefix='bava-race')
+    futures = {executor.submit(extract, attempt): attempt for attempt in attempts}
+    winner, winner_info = None, None
+    try:
+        pending = set(futures)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    info = future.result()
+                except Exception as e:
+                    debug_log("race attempt failed label=%s err=%s", futures[future]['label'], str(e))
+                    continue
+                if info:
+                    winner, winner_info = futures[future], info
+                    break
+    finally:
+        cancel_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    debug_log(
+        "race finished winner=%s elapsed=%.2fs",
+        winner['label'] if winner else None, time.time() - started_at
+    )
+    return winner, winner_info
+
+def collect_output_paths(info, download_dir, file_id):
+    """Final file paths yt-dlp reports for this download, most specific first."""
+    candidates = []
+    for requested in (info or {}).get('requested_downloads') or []:
+        candidates.extend([requested.get('filepath'), requested.get('_filename')])
+    candidates.extend([(info or {}).get('filepath'), (info or {}).get('_filename')])
+
+    paths = []
+    for candidate in candidates:
+        if not candidate:
+            continue
+        path = os.path.abspath(candidate)
+        # Only accept files from this job, never a stale file from another download.
+        if os.path.dirname(path) != download_dir or not os.path.basename(path).startswith(file_id):
+            continue
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+def wait_for_output_file(paths):
+    """
+    Wait until one of the known output paths exists.
+    Only the exact paths are stat()ed, so the cost does not grow with the directory size.
+    Returns (path or None, number of checks).
+    """
+    if not paths:
+        return None, 0
+    deadline = time.time() + DOWNLOAD_FILE_WAIT_TIMEOUT_SECONDS
+    delay = 0.02
+    checks = 0
+    while True:
+        checks += 1
+        for path in paths:
+            if os.path.isfile(path):
+                return path, checks
+        if time.time() >= deadline:
+            return None, checks
+        time.sleep(delay)
+        delay = min(delay * 2, DOWNLOAD_FILE_WAIT_MAX_INTERVAL_SECONDS)
+
+def scan_for_output_file(download_dir, file_id):
+    """Last resort when yt-dlp reported no usable path: one prefix scan of the directory."""
+    try:
+        with os.scandir(download_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(file_id) and not entry.name.endswith(('.part', '.tmp', '.ytdl')) and entry.is_file():
+                    return entry.path
+    except OSError as e:
+        logger.warning(f"Failed to scan download directory {download_dir}: {e}")
+    return None
+
+class MediaDownloadError(Exception):
+    """Download failure that already carries the user-facing message and HTTP status."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+def get_rate_per_second(platform, kind):
+    limits = _rate_limits_per_minute.get(kind, {})
+    per_minute = limits.get(platform)
+    return per_minute / 60.0 if per_minute else None
+
+def get_throttle_state(platform):
+    return _throttle_state.setdefault(platform, {
+        'consecutive_throttles': 0,
+        'blocked_until': 0.0,
+        'last_throttled_at': None,
+        'total_throttles': 0,
+    })
+
+def acquire_rate_limit(platform, kind, max_wait=None, on_wait=None):
+    """
+    Block until the platform is out of its throttle backoff and a token of `kind`
+    ('extract' or 'download') is available. Raises MediaDownloadError(429) instead of
+    waiting longer than max_wait.
+    """
+    max_wait = RATE_LIMIT_MAX_WAIT_SECONDS if max_wait is None else max_wait
+    deadline = time.time() + max_wait
+    rate = get_rate_per_second(platform, kind)
+    while True:
+        with _rate_limit_lock:
+            now = time.time()
+            wait = max(0.0, get_throttle_state(platform)['blocked_until'] - now)
+            if wait == 0 and rate:
+                bucket = _rate_buckets.setdefault((platform, kind), {'tokens': float(RATE_LIMIT_BURST), 'updated_at': now})
+                bucket['tokens'] = min(float(RATE_LIMIT_BURST), bucket['tokens'] + (now - bucket['updated_at']) * rate)
+                bucket['updated_at'] = now
+                if bucket['tokens'] >= 1:
+                    bucket['tokens'] -= 1
+                    return
+                wait = (1 - bucket['tokens']) / rate
+            elif wait == 0:
+                return
+        if now + wait > deadline:
+            debug_log("rate limit reject platform=%s kind=%s wait=%.1fs", platform, kind, wait)
+            raise MediaDownloadError(
+                f'{platform} 요청이 많아 잠시 대기 중입니다. {int(wait) + 1}초 후 다시 시도해주세요.', 429
+            )
+        if on_wait:
+            on_wait(wait)
+        time.sleep(min(wait, 1.0))
+
+def is_throttle_error(err_text):
+    return any(marker in err_text for marker in ('HTTP Error 403', 'HTTP Error 429', 'Too Many Requests'))
+
+def report_platform_throttled(platform):
+    """Back off exponentially (with jitter) after the site answered 403/429."""
+    with _rate_limit_lock:
+        state = get_throttle_state(platform)
+        state['consecutive_throttles'] += 1
+        state['total_throttles'] += 1
+        state['last_throttled_at'] = time.time()
+        delay = min(
+            THROTTLE_BACKOFF_MAX_SECONDS,
+            THROTTLE_BACKOFF_BASE_SECONDS * (2 ** (state['consecutive_throttles'] - 1)),
+        ) * random.uniform(0.5, 1.5)
+        state['blocked_until'] = max(state['blocked_until'], time.time() + delay)
+    logger.warning(f"{platform} throttled us, backing off {delay:.1f}s")
+
+def report_platform_success(platform):
+    with _rate_limit_lock:
+        get_throttle_state(platform)['consecutive_throttles'] = 0
+
+def fetch_media(video_url, platform, format_code, quality, selected_format, download_dir, file_id, report_progress, race=None, tuning=None, resume_attempt=None):
+    """
+    Run the yt-dlp strategies for one URL and return the downloaded file.
+    `tuning` is a normalized download tuning dict (see normalize_download_tuning).
+    `resume_attempt` is the strategy label a resumed job was on; it is tried first so the
+    existing .part bytes (same file_id, same format) are continued.
+    Returns {'path', 'ext_with_dot', 'title'}; raises DownloadError or MediaDownloadError.
+    """
+    output_path = os.path.join(download_dir, f"{file_id}.%(ext)s")
+    ydl_opts = {
+        'format': selected_format,
+        'outtmpl': output_path,
+        'restrictfilenames': True,
+        'nocheckcertificate': True,  # 인증서 확인 건너뛰기
+        'ignoreerrors': False,  # 오류를 명확히 surface 해서 잘못된 파일 저장 방지
+        'continuedl': True,  # 재시작 후 남은 .part 파일에서 이어받기
+        'no_warnings': True,
+        'quiet': True,
+        'noprogress': True,  # quiet만으로는 진행률 표시줄이 stdout에 찍힌다 (진행률은 progress_hooks로 받는다)
+        # 사용자 에이전트 추가
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        }
+    }
+    # 시도별로 첫 다운로드 진행 이벤트가 올 때까지를 추출 시간으로 본다.
+    attempt_timing = {'label': None, 'started_at': 0.0, 'extracted': True}
+
+    def observed_progress(**fields):
+        if fields.get('phase') == 'download' and not attempt_timing['extracted']:
+            attempt_timing['extracted'] = True
+            metric_observe(
+                'bava_extraction_seconds', time.time() - attempt_timing['started_at'],
+                platform=platform, attempt=attempt_timing['label'],
+            )
+        report_progress(**fields)
+
+    progress_hooks, postprocessor_hooks = build_progress_hooks(observed_progress, platform)
+    ydl_opts['progress_hooks'] = progress_hooks
+    ydl_opts['postprocessor_hooks'] = postprocessor_hooks
+    # 모든 시도(기본/대체 전략)가 같은 전송 설정을 쓰도록 공통 옵션에 넣는다.
+    apply_download_tuning(ydl_opts, resolve_download_tuning(tuning or APP_SETTINGS.get('download_tuning')))
+    ydl_opts.update(build_postprocess_options(format_code))
+        
+    # 플랫폼별 특화 옵션 추가
+    if platform == 'instagram':
+        ydl_opts.update({
+            'extract_flat': False,  # 실제 다운로드를 위해 상세 정보 추출
+        })
+    elif platform == 'facebook':
+        ydl_opts.update({
+            'extract_flat': False,
+            'force_generic_extractor': False,  # 페이스북 전용 추출기 사용
+        })
     
+    logger.info(f"Starting download for: {video_url}")
+    if platform == 'youtube':
+        attempts_to_try = order_download_attempts(
+            build_youtube_download_attempts(format_code, quality, selected_format)
+        )
+    else:
+        attempts_to_try = [{
+            'label': 'primary',
+            'format': selected_format,
+            'extractor_args': None,
+        }]
+    if resume_attempt:
+        attempts_to_try.sort(key=lambda attempt: attempt['label'] != resume_attempt)
+
+    cached_info = get_cached_extraction(platform, video_url)
+    if cached_info is not None:
+        # Reuse the metadata /api/video-info already extracted; on failure the
+        # regular strategies below still run with a fresh extraction.
+        attempts_to_try = [{
+            'label': 'cached-info',
+            'format': selected_format,
+            'extractor_args': None,
+            'info': cached_info,
+        }] + attempts_to_try
+
+    race_enabled = YOUTUBE_RACE_MODE if race is None else bool(race)
+    if platform == 'youtube' and race_enabled and cached_info is None:
+        report_progress(phase='extract', attempt='race')
+        winner, winner_info = race_youtube_extractions(video_url, ydl_opts, attempts_to_try[:YOUTUBE_RACE_WIDTH])
+        if winner:
+            attempts_to_try = [dict(winner, info=winner_info)] + [
+                attempt for attempt in attempts_to_try if attempt['label'] != winner['label']
+            ]
+
+    media_exts = MEDIA_EXTS
+    blocked_exts = BLOCKED_EXTS
+    info = None
+    last_download_error = None
+    # 개별 전략의 403은 대체 전략이 처리할 몫이므로, 플랫폼 백오프는 모든 전략이 실패한 뒤에만 건다.
+    throttle_failures = 0
+    for idx, attempt in enumerate(attempts_to_try, start=1):
+        selector = attempt['format']
+        current_opts = dict(ydl_opts)
+        current_opts['format'] = selector
+        if attempt.get('extractor_args'):
+            current_opts['extractor_args'] = attempt['extractor_args']
+        report_progress(phase='extract', attempt=attempt.get('label'))
+        debug_log(
+            "try selector file_id=%s idx=%s label=%s selector=%s extractor_args=%s",
+            file_id, idx, attempt.get('label'), selector, attempt.get('extractor_args')
+        )
+        # 앞선 시도의 후처리에서 네트워크 슬롯을 내줬다면 다시 받아야 플랫폼 동시 실행 한도가 지켜진다.
+        reacquire_network_slot = getattr(_job_context, 'reacquire_network_slot', None)
+        if reacquire_network_slot:
+            reacquire_network_slot()
+        try:
+            acquire_rate_limit(platform, 'download', on_wait=lambda wait: report_progress(phase='throttled', retry_in=round(wait, 1)))
+        except MediaDownloadError as e:
+            # Another job's backoff is too long to wait out; try the next strategy instead.
+            debug_log("selector skipped by rate limit file_id=%s idx=%s", file_id, idx)
+            if idx == len(attempts_to_try):
+                if throttle_failures:
+                    report_platform_throttled(platform)
+                raise last_download_error or e
+            continue
+        attempt_started_at = time.time()
+        attempt_timing.update(label=attempt.get('label'), started_at=attempt_started_at, extracted=False)
+        try:
+            with pooled_youtube_dl(current_opts, platform) as ydl:
+                route_postprocessing_to_pool(ydl)
+                logger.info("YoutubeDL initialized (attempt %s)", idx)
+                if attempt.get('info') is not None:
+                    info = ydl.process_ie_result(attempt['info'], download=True)
+                else:
+                    info = ydl.extract_info(video_url, download=True)
+                if not info:
+                    raise yt_dlp.utils.DownloadError('다운로드 가능한 미디어를 찾지 못했습니다')
+                if isinstance(info, dict) and info.get('entries'):
+                    entries = [entry for entry in info.get('entries', []) if entry]
+                    if not entries:
+                        raise yt_dlp.utils.DownloadError('다운로드 가능한 미디어를 찾지 못했습니다')
+                    info = entries[0]
+
+                if platform == 'youtube':
+                    extractor_key = str((info or {}).get('extractor_key') or '').lower()
+                    if extractor_key and 'youtube' not in extractor_key:
+                        debug_log(
+                            "selector non-youtube extractor file_id=%s idx=%s extractor=%s",
+                            file_id, idx, extractor_key
+                        )
+                        raise yt_dlp.utils.DownloadError(
+                            f'non-youtube extractor resolved: {extractor_key}'
+                        )
+
+                # If extractor resolved to non-media extension, retry next strategy.
+                resolved_ext = str((info or {}).get('ext') or '').lower().strip()
+                if resolved_ext and (resolved_ext in blocked_exts or resolved_ext not in media_exts):
+                    debug_log(
+                        "selector non-media result file_id=%s idx=%s ext=%s",
+                        file_id, idx, resolved_ext
+                    )
+                    try:
+                        for f in os.listdir(download_dir):
+                            if f.startswith(file_id):
+                                p = os.path.join(download_dir, f)
+                                if os.path.isfile(p):
+                                    os.remove(p)
+                    except Exception:
+                        pass
+                    raise yt_dlp.utils.DownloadError(
+                        f'non-media format resolved: {resolved_ext}'
+                    )
+                record_attempt_outcome(attempt.get('label'), True, time.time() - attempt_started_at)
+                metric_inc('bava_download_attempts_total', platform=platform, attempt=attempt.get('label'), outcome='success')
+                report_platform_success(platform)
+                break
+        except yt_dlp.utils.DownloadError as e:
+            record_attempt_outcome(attempt.get('label'), False, time.time() - attempt_started_at)
+            metric_inc('bava_download_attempts_total', platform=platform, attempt=attempt.get('label'), outcome='failure')
+            metric_inc('bava_download_errors_total', platform=platform, error_class=classify_download_error(str(e)))
+            if is_throttle_error(str(e)):
+                throttle_failures += 1
+            last_download_error = e
+            invalidate_cached_extraction(platform, video_url)
+            debug_log("selector failed file_id=%s idx=%s err=%s", file_id, idx, str(e))
+            if idx == len(attempts_to_try):
+                if throttle_failures:
+                    report_platform_throttled(platform)
+                raise
+            continue
+
+    if not info:
+        if last_download_error:
+            raise last_download_error
+        raise MediaDownloadError('다운로드 가능한 미디어를 찾지 못했습니다. 영상 권한 또는 포맷을 확인해주세요.', 400)
+
+    logger.info(f"Download completed, info: {info.get('title')}")
+    debug_log("ydl completed file_id=%s title=%s", file_id, info.get('title'))
+        
+    # yt-dlp가 보고한 최종 경로를 그대로 사용하고, 후처리가 늦게 끝나는 경우(Windows)만 해당 경로를 기다린다.
+    candidate_paths = collect_output_paths(info, download_dir, file_id)
+    resolved_path, wait_checks = wait_for_output_file(candidate_paths)
+    metric_observe('bava_file_wait_checks', wait_checks)
+    if not resolved_path:
+        resolved_path = scan_for_output_file(download_dir, file_id)
+    filename = os.path.basename(resolved_path) if resolved_path else None
+    debug_log(
+        "post-download file_id=%s candidates=%s checks=%s filename=%s",
+        file_id, candidate_paths, wait_checks, filename
+    )
+
+    if not filename:
+        debug_log("filename unresolved file_id=%s dir=%s", file_id, download_dir)
+        raise MediaDownloadError('파일 다운로드 후 찾을 수 없습니다', 500)
+        
+    temp_download_path = os.path.join(download_dir, filename)
+    logger.info(f"Found downloaded file: {temp_download_path}")
+
+    _, ext_with_dot = os.path.splitext(filename)
+    ext = ext_with_dot.lower().lstrip('.')
+    if ext in blocked_exts or ext not in media_exts:
+        debug_log(
+            "blocked non-media output file_id=%s filename=%s ext=%s",
+            file_id, filename, ext
+        )
+        try:
+            os.remove(temp_download_path)
+        except Exception:
+            pass
+        metric_inc('bava_download_errors_total', platform=platform, error_class='non_media_ext')
+        raise MediaDownloadError('미디어 파일이 아닌 형식으로 감지되어 다운로드를 중단했습니다', 400)
+
+    return {
+        'path': temp_download_path,
+        'ext_with_dot': ext_with_dot,
+        'title': info.get('title'),
+    }
+
+def run_single_flight(key, work, report_progress):
+    """
+    Run work(report_progress) once per key. Callers arriving while it is in flight
+    wait for the same result and receive its progress updates.
+    Returns (result, is_leader).
+    """
+    with _inflight_downloads_lock:
+        flight = _inflight_downloads.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = {'done': threading.Event(), 'result': None, 'error': None, 'listeners': []}
+            _inflight_downloads[key] = flight
+        flight['listeners'].append(report_progress)
+
+    if not is_leader:
+        debug_log("single-flight attach key=%s", key)
+        flight['done'].wait()
+        if flight['error'] is not None:
+            raise flight['error']
+        return flight['result'], False
+
+    def broadcast(**fields):
+        for listener in list(flight['listeners']):
+            listener(**fields)
+
+    try:
+        flight['result'] = work(broadcast)
+        return flight['result'], True
+    except Exception as e:
+        flight['error'] = e
+        raise
+    finally:
+        with _inflight_downloads_lock:
+            _inflight_downloads.pop(key, None)
+        flight['done'].set()
+
+def place_downloaded_file(source_path, download_dir, base_name, ext_with_dot, move):
+    """
+    Give a downloaded file its user-facing name. The flight leader moves its temp file;
+    attached requests that asked for another name get a hardlink (or a copy when the
+    filesystem does not support links).
+    """
+    final_filename = ensure_unique_filename(download_dir, base_name, ext_with_dot)
+    final_download_path = os.path.join(download_dir, final_filename)
+    if move:
+        os.replace(source_path, final_download_path)
+    else:
+        try:
+            os.link(source_path, final_download_path)
+        except OSError:
+            shutil.copy2(source_path, final_download_path)
+    return final_filename, final_download_path
+
+def reuse_stored_media(stored, file_id, custom_filename, app_url):
+    """
+    Hand out a new /api/files token for an already downloaded file. When the user has since
+    picked another download folder, the file is linked (or copied) into that folder first.
+    """
+    download_dir = get_download_dir()
+    final_filename, final_download_path = stored['filename'], stored['path']
+    base_name = sanitize_filename(custom_filename or stored['title'])
+    stored_base_name, ext_with_dot = os.path.splitext(stored['filename'])
+    moved_dir = os.path.dirname(stored['path']) != download_dir
+    if moved_dir or (custom_filename and base_name != stored_base_name):
+        final_filename, final_download_path = place_downloaded_file(
+            stored['path'], download_dir, base_name, ext_with_dot, move=False
+        )
+    register_download_file(file_id, final_download_path, final_filename)
+    debug_log("media index reuse file_id=%s path=%s", file_id, final_download_path)
+    return {
+        'success': True,
+        'download_url': f"{app_url}/api/files/{file_id}",
+        'filename': final_filename,
+        'title': stored['title'],
+        'reused': True,
+    }
+
+def find_stored_download(params):
+    """
+    Answer a download request from the media index without running yt-dlp. This runs on the
+    request thread, so it never resolves short links over the network or imports yt-dlp (both
+    can take seconds); a miss here is looked up again inside the job with the full resolution.
+    """
+    if not yt_dlp.loaded:
+        return None
+    platform = params.get('platform') or 'youtube'
+    video_url = clean_platform_url(params.get('url'), platform, cached_only=True)
+    selected_format = build_format_selector(params.get('format') or 'best', params.get('quality') or 'best', platform)
+    output_key = build_output_key(selected_format, params.get('format'))
+    stored = lookup_stored_media(build_media_key(platform, video_url), output_key)
+    # 다른 폴더로 옮겨 담아야 하면 복사가 길어질 수 있어 작업 스레드에서 처리한다.
+    if not stored or os.path.dirname(stored['path']) != get_download_dir():
+        return None
+    app_url = params.get('url_root', '').rstrip('/')
+    return reuse_stored_media(stored, str(uuid.uuid4()), params.get('filename') or '', app_url)
+
+def perform_download(params, report_progress=None):
+    """
+    Run one download job to completion on a worker thread.
+    Returns (payload, status_code) in the same shape the API responds with.
+    """
+    if report_progress is None:
+        report_progress = lambda **fields: None
+    video_url = params.get('url')
+    format_code = params.get('format') or 'best'
+    quality = params.get('quality') or 'best'
+    platform = params.get('platform') or 'youtube'
+    custom_filename = params.get('filename') or ''
+    app_url = params.get('url_root', '').rstrip('/')
+
     # 디렉토리 존재 여부 확인 및 로깅
     download_dir = get_download_dir()
     logger.info(f"Download directory exists: {os.path.exists(download_dir)}")
-    
+
     # 임시 파일 ID 생성 (다운로드 완료 후 사용자 파일명으로 변경)
-    file_id = str(uuid.uuid4())
-    output_path = os.path.join(download_dir, f"{file_id}.%(ext)s")
+    # 작업 저널에 기록된 file_id를 그대로 써야 재시작 후 같은 .part 파일을 이어받는다.
+    file_id = params.get('file_id') or str(uuid.uuid4())
     debug_log(
         "start file_id=%s platform=%s format=%s quality=%s dir=%s",
         file_id, platform, format_code, quality, download_dir
     )
-    
+
     try:
+        video_url = clean_platform_url(video_url, platform)
         selected_format = build_format_selector(format_code, quality, platform)
         logger.info(
             "Resolved format selector - requested format=%s quality=%s platform=%s selector=%s",
@@ -610,212 +2892,854 @@ def download_video():
         )
         debug_log("selector file_id=%s selector=%s", file_id, selected_format)
 
-        ydl_opts = {
-            'format': selected_format,
-            'outtmpl': output_path,
-            'restrictfilenames': True,
-            'nocheckcertificate': True,  # 인증서 확인 건너뛰기
-            'ignoreerrors': False,  # 오류를 명확히 surface 해서 잘못된 파일 저장 방지
-            'no_warnings': True,
-            'quiet': True,
-            # 사용자 에이전트 추가
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            }
-        }
-            
-        # 플랫폼별 특화 옵션 추가
-        if platform == 'instagram':
-            video_url = clean_instagram_url(video_url)
-            ydl_opts.update({
-                'extract_flat': False,  # 실제 다운로드를 위해 상세 정보 추출
-            })
-        elif platform == 'youtube':
-            video_url = normalize_youtube_url(video_url)
-        elif platform == 'facebook':
-            video_url = clean_facebook_url(video_url)
-            ydl_opts.update({
-                'extract_flat': False,
-                'force_generic_extractor': False,  # 페이스북 전용 추출기 사용
-            })
-        
-        logger.info(f"Starting download for: {video_url}")
-        if platform == 'youtube':
-            attempts_to_try = build_youtube_download_attempts(format_code, quality, selected_format)
-        else:
-            attempts_to_try = [{
-                'label': 'primary',
-                'format': selected_format,
-                'extractor_args': None,
-            }]
-
-        media_exts = {'mp4', 'webm', 'mp3', 'm4a', 'mkv', 'mov'}
-        blocked_exts = {'mhtml', 'html', 'htm', 'json', 'txt'}
-        info = None
-        last_download_error = None
-        for idx, attempt in enumerate(attempts_to_try, start=1):
-            selector = attempt['format']
-            current_opts = dict(ydl_opts)
-            current_opts['format'] = selector
-            if attempt.get('extractor_args'):
-                current_opts['extractor_args'] = attempt['extractor_args']
-            debug_log(
-                "try selector file_id=%s idx=%s label=%s selector=%s extractor_args=%s",
-                file_id, idx, attempt.get('label'), selector, attempt.get('extractor_args')
+        media_key = build_media_key(platform, video_url)
+        output_key = build_output_key(selected_format, format_code)
+        stored = lookup_stored_media(media_key, output_key)
+        if stored:
+            return reuse_stored_media(stored, file_id, custom_filename, app_url), 200
+
+        def download_and_place(progress):
+            media = fetch_media(
+                video_url, platform, format_code, quality, selected_format,
+                download_dir, file_id, progress, race=params.get('race'), tuning=params.get('tuning'),
+                resume_attempt=params.get('resume_attempt'),
             )
-            try:
-                with yt_dlp.YoutubeDL(current_opts) as ydl:
-                    logger.info("YoutubeDL initialized (attempt %s)", idx)
-                    info = ydl.extract_info(video_url, download=True)
-                    if not info:
-                        raise yt_dlp.utils.DownloadError('다운로드 가능한 미디어를 찾지 못했습니다')
-                    if isinstance(info, dict) and info.get('entries'):
-                        entries = [entry for entry in info.get('entries', []) if entry]
-                        if not entries:
-                            raise yt_dlp.utils.DownloadError('다운로드 가능한 미디어를 찾지 못했습니다')
-                        info = entries[0]
-
-                    if platform == 'youtube':
-                        extractor_key = str((info or {}).get('extractor_key') or '').lower()
-                        if extractor_key and 'youtube' not in extractor_key:
-                            debug_log(
-                                "selector non-youtube extractor file_id=%s idx=%s extractor=%s",
-                                file_id, idx, extractor_key
-                            )
-                            raise yt_dlp.utils.DownloadError(
-                                f'non-youtube extractor resolved: {extractor_key}'
-                            )
-
-                    # If extractor resolved to non-media extension, retry next strategy.
-                    resolved_ext = str((info or {}).get('ext') or '').lower().strip()
-                    if resolved_ext and (resolved_ext in blocked_exts or resolved_ext not in media_exts):
-                        debug_log(
-                            "selector non-media result file_id=%s idx=%s ext=%s",
-                            file_id, idx, resolved_ext
-                        )
-                        try:
-                            for f in os.listdir(download_dir):
-                                if f.startswith(file_id):
-                                    p = os.path.join(download_dir, f)
-                                    if os.path.isfile(p):
-                                        os.remove(p)
-                        except Exception:
-                            pass
-                        raise yt_dlp.utils.DownloadError(
-                            f'non-media format resolved: {resolved_ext}'
-                        )
-                    break
-            except yt_dlp.utils.DownloadError as e:
-                last_download_error = e
-                debug_log("selector failed file_id=%s idx=%s err=%s", file_id, idx, str(e))
-                if idx == len(attempts_to_try):
-                    raise
-                continue
-
-        if not info:
-            if last_download_error:
-                raise last_download_error
-            return jsonify({'error': '다운로드 가능한 미디어를 찾지 못했습니다. 영상 권한 또는 포맷을 확인해주세요.'}), 400
-
-        logger.info(f"Download completed, info: {info.get('title')}")
-        debug_log("ydl completed file_id=%s title=%s", file_id, info.get('title'))
-            
-        # Windows 환경에서 yt-dlp 후처리(병합/이름변경)가 늦게 끝나는 경우가 있어 재시도한다.
-        filename = None
-        prepared_path = None
-        max_wait_attempts = int(os.environ.get('DOWNLOAD_FILE_WAIT_ATTEMPTS', '60'))
-        wait_interval_seconds = float(os.environ.get('DOWNLOAD_FILE_WAIT_INTERVAL_SECONDS', '0.5'))
-        for _ in range(max_wait_attempts):
-            try:
-                files_in_dir = os.listdir(download_dir)
-            except Exception:
-                files_in_dir = []
-
-            if prepared_path:
-                prepared_name = os.path.basename(prepared_path)
-                if os.path.exists(prepared_path):
-                    filename = prepared_name
-                else:
-                    prepared_no_ext, _ = os.path.splitext(prepared_name)
-                    if prepared_no_ext:
-                        matched = sorted(glob.glob(os.path.join(download_dir, f"{prepared_no_ext}.*")))
-                        matched = [m for m in matched if not m.endswith(('.part', '.tmp', '.ytdl'))]
-                        if matched:
-                            filename = os.path.basename(matched[0])
-
-            if not filename:
-                for file in files_in_dir:
-                    if file.startswith(file_id) and not file.endswith(('.part', '.tmp', '.ytdl')):
-                        filename = file
-                        break
-
-            if filename:
-                break
-            time.sleep(wait_interval_seconds)
-
-        logger.info(f"Files in directory: {os.listdir(download_dir)}")
-        debug_log(
-            "post-download file_id=%s attempts=%s filename=%s",
-            file_id, max_wait_attempts, filename
-        )
-            
-        if not filename:
-            debug_log("filename unresolved file_id=%s dir=%s", file_id, download_dir)
-            return jsonify({'error': '파일 다운로드 후 찾을 수 없습니다'}), 500
-            
-        temp_download_path = os.path.join(download_dir, filename)
-        logger.info(f"Found downloaded file: {temp_download_path}")
-
-        _, ext_with_dot = os.path.splitext(filename)
-        ext = ext_with_dot.lower().lstrip('.')
-        if ext in blocked_exts or ext not in media_exts:
-            debug_log(
-                "blocked non-media output file_id=%s filename=%s ext=%s",
-                file_id, filename, ext
+            base_name = sanitize_filename(custom_filename or media['title'])
+            progress(phase='move')
+            final_filename, final_download_path = place_downloaded_file(
+                media['path'], download_dir, base_name, media['ext_with_dot'], move=True
             )
-            try:
-                os.remove(temp_download_path)
-            except Exception:
-                pass
-            return jsonify({'error': '미디어 파일이 아닌 형식으로 감지되어 다운로드를 중단했습니다'}), 400
-
-        base_name = sanitize_filename(custom_filename or info.get('title'))
-        final_filename = ensure_unique_filename(download_dir, base_name, ext_with_dot)
-        final_download_path = os.path.join(download_dir, final_filename)
-        os.replace(temp_download_path, final_download_path)
-        logger.info(f"Final downloaded file: {final_download_path}")
-        debug_log("moved file_id=%s from=%s to=%s", file_id, temp_download_path, final_download_path)
-            
+            logger.info(f"Final downloaded file: {final_download_path}")
+            debug_log("moved file_id=%s from=%s to=%s", file_id, media['path'], final_download_path)
+            store_media(media_key, output_key, final_download_path, final_filename, media['title'])
+            return dict(media, path=final_download_path, filename=final_filename, base_name=base_name)
+
+        # 같은 URL+포맷을 동시에 요청하면 한 번만 받아서 결과를 공유한다.
+        flight_key = (platform, video_url, output_key, download_dir)
+        media, is_leader = run_single_flight(flight_key, download_and_place, report_progress)
+        final_filename, final_download_path = media['filename'], media['path']
+        if not is_leader:
+            base_name = sanitize_filename(custom_filename or media['title'])
+            if base_name != media['base_name'] or not os.path.exists(final_download_path):
+                report_progress(phase='move')
+                final_filename, final_download_path = place_downloaded_file(
+                    media['path'], download_dir, base_name, media['ext_with_dot'], move=False
+                )
+            debug_log("single-flight shared file_id=%s path=%s", file_id, final_download_path)
+
         register_download_file(file_id, final_download_path, final_filename)
 
-            # 파일 다운로드 URL 생성 (절대 URL 사용)
-        app_url = request.url_root.rstrip('/')  # 애플리케이션의 기본 URL 가져오기
+        # 파일 다운로드 URL 생성 (절대 URL 사용)
         download_url = f"{app_url}/api/files/{file_id}"
         logger.info(f"Generated download URL: {download_url}")
         debug_log("download url file_id=%s url=%s", file_id, download_url)
-            
-        return jsonify({
-            'success': True, 
+
+        return {
+            'success': True,
             'download_url': download_url,
             'filename': final_filename,
-            'title': info.get('title')
-        })
-            
+            'title': media['title']
+        }, 200
+
+    except MediaDownloadError as e:
+        debug_log("download failed file_id=%s err=%s", file_id, e.message)
+        return {'error': e.message}, e.status_code
     except yt_dlp.utils.DownloadError as e:
         logger.warning(f"yt-dlp download error: {e}")
         debug_log("yt-dlp error file_id=%s err=%s", file_id, str(e))
         err_text = str(e)
         if 'non-media format resolved: mhtml' in err_text:
-            return jsonify({
+            return {
                 'error': 'YouTube가 미디어 대신 차단 응답(mhtml)을 반환했습니다. 앱을 최신 버전으로 업데이트하고 다시 시도해주세요.'
-            }), 400
+            }, 400
         if 'HTTP Error 403' in err_text:
-            return jsonify({'error': 'YouTube 접근이 차단되어 다운로드에 실패했습니다 (HTTP 403). 잠시 후 다시 시도해주세요.'}), 400
-        return jsonify({'error': f'다운로드 가능한 포맷을 찾지 못했습니다: {err_text}'}), 400
+            return {'error': 'YouTube 접근이 차단되어 다운로드에 실패했습니다 (HTTP 403). 잠시 후 다시 시도해주세요.'}, 400
+        return {'error': f'다운로드 가능한 포맷을 찾지 못했습니다: {err_text}'}, 400
     except Exception as e:
         logger.exception("Error downloading video")
         debug_log("unexpected error file_id=%s err=%s", file_id, str(e))
-        return jsonify({'error': f'동영상 다운로드 중 오류가 발생했습니다: {str(e)}'}), 500
+        return {'error': f'동영상 다운로드 중 오류가 발생했습니다: {str(e)}'}, 500
+
+def prune_download_jobs():
+    now = time.time()
+    with _download_jobs_lock:
+        expired = [
+            job_id for job_id, job in _download_jobs.items()
+            if job.get('finished_at') and now - job['finished_at'] > DOWNLOAD_JOB_RETENTION_SECONDS
+        ]
+        for job_id in expired:
+            _download_jobs.pop(job_id, None)
+        expired_batches = [
+            batch_id for batch_id, batch in _download_batches.items()
+            if not batch['expanding'] and now - batch['created_at'] > DOWNLOAD_JOB_RETENTION_SECONDS
+            and not any(job_id in _download_jobs for job_id in batch['job_ids'])
+        ]
+        for batch_id in expired_batches:
+            _download_batches.pop(batch_id, None)
+    if expired:
+        debug_log("pruned jobs count=%s", len(expired))
+
+def count_pending_download_jobs():
+    with _download_jobs_lock:
+        return sum(1 for job in _download_jobs.values() if job['status'] in ('queued', 'running'))
+
+def get_download_job(job_id):
+    with _download_jobs_lock:
+        job = _download_jobs.get(job_id)
+        return dict(job) if job else None
+
+def update_download_job(job_id, **fields):
+    with _download_jobs_changed:
+        job = _download_jobs.get(job_id)
+        if job:
+            job.update(fields)
+            job['revision'] += 1
+            _download_jobs_changed.notify_all()
+
+def update_download_progress(job_id, **fields):
+    with _download_jobs_changed:
+        job = _download_jobs.get(job_id)
+        if not job:
+            return
+        progress = dict(job['progress'])
+        progress.update(fields)
+        progress['updated_at'] = time.time()
+        job['progress'] = progress
+        job['revision'] += 1
+        _download_jobs_changed.notify_all()
+
+def serialize_download_job(job):
+    payload = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'url': job['params'].get('url'),
+        'platform': job['params'].get('platform'),
+        'created_at': job['created_at'],
+        'started_at': job.get('started_at'),
+        'finished_at': job.get('finished_at'),
+        'progress': job.get('progress'),
+        'batch_id': job['params'].get('batch_id'),
+    }
+    if job['status'] == 'completed':
+        payload['result'] = job.get('result')
+    elif job['status'] == 'failed':
+        payload['error'] = (job.get('result') or {}).get('error')
+        payload['error_status'] = job.get('status_code')
+    return payload
+
+def run_download_job(job_id):
+    job = get_download_job(job_id)
+    if not job:
+        return
+    started_at = time.time()
+    update_download_job(job_id, status='running', started_at=started_at)
+    journal_job_event(job_id, 'running')
+    debug_log("job running job_id=%s", job_id)
+    current_attempt = {'label': job['params'].get('resume_attempt')}
+
+    def report_progress(**fields):
+        if fields.get('attempt') and fields['attempt'] != current_attempt['label']:
+            current_attempt['label'] = fields['attempt']
+            journal_job_event(job_id, 'attempt', {'attempt': fields['attempt']})
+        update_download_progress(job_id, **fields)
+
+    try:
+        payload, status_code = perform_download(job['params'], report_progress=report_progress)
+    except Exception as e:
+        logger.exception("Download job crashed")
+        payload, status_code = {'error': f'동영상 다운로드 중 오류가 발생했습니다: {str(e)}'}, 500
+
+    status = 'completed' if payload.get('success') else 'failed'
+    if status == 'completed':
+        update_download_progress(job_id, phase='done', eta=0)
+    finished_at = time.time()
+    update_download_job(
+        job_id,
+        status=status,
+        result=payload,
+        status_code=status_code,
+        finished_at=finished_at,
+    )
+    journal_job_event(job_id, status, {'result': payload, 'status_code': status_code})
+    metric_inc('bava_download_jobs_total', status=status)
+    metric_observe('bava_download_job_queue_seconds', started_at - job['created_at'])
+    metric_observe('bava_download_job_seconds', finished_at - started_at)
+    debug_log("job finished job_id=%s status=%s", job_id, status)
+
+def build_download_job(job_id, params, created_at):
+    return {
+        'id': job_id,
+        'status': 'queued',
+        'params': params,
+        'created_at': created_at,
+        'started_at': None,
+        'finished_at': None,
+        'result': None,
+        'status_code': None,
+        'progress': {
+            'phase': 'queued',
+            'downloaded_bytes': None,
+            'total_bytes': None,
+            'speed': None,
+            'eta': None,
+            'updated_at': time.time(),
+        },
+        'revision': 0,
+    }
+
+def submit_download_job(params, result=None, job_id=None, created_at=None):
+    """
+    Queue a download job; a ready result (e.g. from the media index) completes it immediately.
+    `job_id`/`created_at` are passed when a journaled job is resumed after a restart.
+    """
+    prune_download_jobs()
+    resumed = job_id is not None
+    job_id = job_id or str(uuid.uuid4())
+    params = dict(params, file_id=params.get('file_id') or str(uuid.uuid4()))
+    now = time.time()
+    job = build_download_job(job_id, params, created_at or now)
+    if result is not None:
+        job.update(status='completed', result=result, status_code=200, started_at=now, finished_at=now)
+        job['progress']['phase'] = 'done'
+    with _download_jobs_lock:
+        _download_jobs[job_id] = job
+    if not resumed:
+        journal_job_event(job_id, 'queued', {'params': params})
+    if result is not None:
+        journal_job_event(job_id, 'completed', {'result': result, 'status_code': 200})
+        debug_log("job completed from media index job_id=%s", job_id)
+        return job_id
+    enqueue_platform_job(job_id, params.get('platform') or 'youtube')
+    debug_log("job queued job_id=%s url=%s", job_id, params.get('url'))
+    return job_id
+
+def resume_journaled_jobs(restore_finished=True):
+    """
+    Rebuild jobs from the journal after a restart. Unfinished jobs whose owner's lease has
+    lapsed are queued again under the same job_id and file_id (so yt-dlp continues their .part
+    files); with `restore_finished` (startup only), recently finished ones are restored too so
+    their status URLs keep answering.
+    """
+    if not JOB_JOURNAL_ENABLED:
+        return 0
+    resumed = 0
+    leases = load_journal_leases()
+    cutoff = time.time() - DOWNLOAD_JOB_RETENTION_SECONDS
+    for row in load_journaled_jobs() if restore_finished else load_orphaned_journaled_jobs():
+        with _download_jobs_lock:
+            if row['job_id'] in _download_jobs:
+                continue
+        params = json.loads(row['queued_data'] or '{}').get('params') or {}
+        data = json.loads(row['data']) if row['data'] else {}
+        if row['state'] in ('completed', 'failed'):
+            if row['recorded_at'] < cutoff:
+                continue
+            job = build_download_job(row['job_id'], params, row['created_at'])
+            job.update(
+                status=row['state'],
+                result=data.get('result'),
+                status_code=data.get('status_code'),
+                finished_at=row['recorded_at'],
+            )
+            if row['state'] == 'completed':
+                job['progress']['phase'] = 'done'
+            with _download_jobs_lock:
+                _download_jobs[row['job_id']] = job
+            continue
+        if is_journal_owner_alive(row['owner'], leases) or not claim_journaled_job(row['job_id'], row['seq']):
+            continue
+        if row['state'] == 'attempt' and data.get('attempt'):
+            params['resume_attempt'] = data['attempt']
+        submit_download_job(params, job_id=row['job_id'], created_at=row['created_at'])
+        resumed += 1
+        logger.info(f"Resumed download job {row['job_id']} ({params.get('url')})")
+    return resumed
+
+def run_journal_heartbeat():
+    while True:
+        time.sleep(JOB_JOURNAL_HEARTBEAT_SECONDS)
+        renew_journal_lease()
+        try:
+            # 죽은 워커(다른 gunicorn 프로세스 등)의 작업은 재시작을 기다리지 않고 여기서 넘겨받는다.
+            resume_journaled_jobs(restore_finished=False)
+        except Exception as e:
+            logger.warning(f"Failed to take over journaled jobs: {e}")
+
+def start_journal_heartbeat():
+    global _journal_heartbeat_started
+    if _journal_heartbeat_started or not JOB_JOURNAL_ENABLED:
+        return
+    _journal_heartbeat_started = True
+    threading.Thread(target=run_journal_heartbeat, name='bava-journal-heartbeat', daemon=True).start()
+
+def parse_platform_concurrency(value):
+    limits = {}
+    for item in str(value or '').split(','):
+        platform, _, limit = item.partition('=')
+        if platform.strip() and limit.strip().isdigit():
+            limits[platform.strip().lower()] = max(1, int(limit))
+    return limits
+
+DOWNLOAD_PLATFORM_CONCURRENCY = parse_platform_concurrency(
+    os.environ.get('DOWNLOAD_PLATFORM_CONCURRENCY', 'youtube=3,tiktok=3,instagram=2,facebook=2')
+)
+
+_rate_limits_per_minute = {
+    'extract': parse_platform_concurrency(RATE_LIMIT_EXTRACT_PER_MINUTE),
+    'download': parse_platform_concurrency(RATE_LIMIT_DOWNLOAD_PER_MINUTE),
+}
+
+def get_platform_limit(platform):
+    return DOWNLOAD_PLATFORM_CONCURRENCY.get(platform, DOWNLOAD_MAX_WORKERS)
+
+def enqueue_platform_job(job_id, platform):
+    """
+    Queue a job behind its platform's concurrency limit. Jobs only reach the worker pool
+    once a slot is free, so a busy platform never holds threads other platforms could use.
+    """
+    with _platform_slots_lock:
+        _platform_queues.setdefault(platform, deque()).append(job_id)
+    dispatch_platform_jobs()
+
+def count_claimed_slots(platform=None):
+    """Slots held or being re-acquired, overall or for one platform. Caller holds _platform_slots_lock."""
+    if platform is not None:
+        return _platform_active.get(platform, 0) + _platform_reacquiring.get(platform, 0)
+    return sum(_platform_active.values()) + sum(_platform_reacquiring.values())
+
+def dispatch_platform_jobs():
+    """
+    Start queued jobs while network slots are free: at most DOWNLOAD_MAX_WORKERS overall
+    and the platform's own limit each. Platforms take turns so one long queue cannot
+    starve the others.
+    """
+    with _platform_slots_lock:
+        started = True
+        while started and count_claimed_slots() < DOWNLOAD_MAX_WORKERS:
+            started = False
+            for platform, queue in _platform_queues.items():
+                if count_claimed_slots() >= DOWNLOAD_MAX_WORKERS:
+                    break
+                if queue and count_claimed_slots(platform) < get_platform_limit(platform):
+                    job_id = queue.popleft()
+                    _platform_active[platform] = _platform_active.get(platform, 0) + 1
+                    _download_executor.submit(run_platform_job, job_id, platform)
+                    started = True
+
+def run_platform_job(job_id, platform):
+    slot = {'held': True}
+
+    def release_network_slot():
+        with _platform_slots_lock:
+            if not slot['held']:
+                return
+            slot['held'] = False
+            _platform_active[platform] = max(0, _platform_active.get(platform, 0) - 1)
+            _platform_slot_freed.notify_all()
+        dispatch_platform_jobs()
+
+    def reacquire_network_slot():
+        """Take a slot back before another network attempt after post-processing gave it up."""
+        with _platform_slots_lock:
+            if slot['held']:
+                return
+            _platform_reacquiring[platform] = _platform_reacquiring.get(platform, 0) + 1
+            try:
+                _platform_slot_freed.wait_for(
+                    lambda: _platform_active.get(platform, 0) < get_platform_limit(platform)
+                    and sum(_platform_active.values()) < DOWNLOAD_MAX_WORKERS
+                )
+            finally:
+                _platform_reacquiring[platform] -= 1
+            _platform_active[platform] = _platform_active.get(platform, 0) + 1
+            slot['held'] = True
+
+    _job_context.release_network_slot = release_network_slot
+    _job_context.reacquire_network_slot = reacquire_network_slot
+    try:
+        run_download_job(job_id)
+    finally:
+        _job_context.release_network_slot = None
+        _job_context.reacquire_network_slot = None
+        release_network_slot()
+
+def looks_like_collection_url(url, platform):
+    """Cheap URL-shape check for playlists/channels so single videos skip the listing step."""
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/')
+    if platform == 'youtube':
+        if 'list=' in parsed.query and 'v=' not in parsed.query:
+            return True
+        return path == '/playlist' or path.startswith(('/@', '/channel/', '/c/', '/user/'))
+    if platform == 'tiktok':
+        return path.startswith('/@') and '/video/' not in path
+    return False
+
+def list_collection_entry_urls(url, platform, limit):
+    """
+    Entry URLs of a playlist/channel from a flat listing (no per-entry extraction), at most
+    `limit` of them. Only the URL strings are kept, and the pooled session is checked back in
+    before they are returned, so it is not held while the entries download.
+    """
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+        'nocheckcertificate': True,
+    }
+    listed = []  # (is_nested_collection, url)
+    acquire_rate_limit(platform, 'extract')
+    with pooled_youtube_dl(ydl_opts, platform) as ydl:
+        info = ydl.extract_info(url, download=False, process=False)
+        if not info:
+            return []
+        if info.get('_type') not in ('playlist', 'multi_video'):
+            return [info.get('webpage_url') or url]
+        # entries는 페이지 단위로 지연 조회되므로 한도에서 멈추면 나머지 페이지는 요청하지 않는다.
+        for entry in info.get('entries') or []:
+            if len(listed) >= limit:
+                break
+            if not entry:
+                continue
+            if entry.get('_type') == 'playlist' or looks_like_collection_url(entry.get('url') or '', platform):
+                listed.append((True, entry.get('url')))
+                continue
+            entry_url = entry.get('url') or entry.get('webpage_url')
+            if not entry_url and platform == 'youtube' and entry.get('id'):
+                entry_url = f"https://www.youtube.com/watch?v={entry['id']}"
+            if entry_url:
+                listed.append((False, entry_url))
+
+    entry_urls = []
+    for nested, entry_url in listed:
+        if len(entry_urls) >= limit:
+            break
+        if nested:
+            # Channel tabs list nested playlists (videos/shorts); flatten one level.
+            entry_urls.extend(list_collection_entry_urls(entry_url, platform, limit - len(entry_urls)))
+        else:
+            entry_urls.append(entry_url)
+    return entry_urls
+
+def count_batch_queued_jobs(batch):
+    return sum(
+        1 for job_id in batch['job_ids']
+        if (_download_jobs.get(job_id) or {}).get('status') == 'queued'
+    )
+
+def run_batch_expansion(batch_id):
+    """
+    Expand batch inputs into download jobs. Collections are listed as URL strings only (up to
+    BATCH_MAX_ITEMS), and job submission stays at most BATCH_PREFETCH_JOBS queued jobs ahead
+    of the downloads.
+    """
+    with _download_jobs_lock:
+        batch = _download_batches.get(batch_id)
+    if not batch:
+        return
+    seen = set()
+    try:
+        for item in batch['items']:
+            if len(seen) >= BATCH_MAX_ITEMS:
+                # 상한에 도달하면 남은 컬렉션 URL은 목록 조회(네트워크)조차 하지 않는다.
+                break
+            platform = item['platform']
+            if looks_like_collection_url(item['url'], platform):
+                urls = list_collection_entry_urls(item['url'], platform, BATCH_MAX_ITEMS - len(seen))
+            else:
+                urls = [item['url']]
+            for entry_url in urls:
+                if len(seen) >= BATCH_MAX_ITEMS:
+                    break
+                entry_url = clean_platform_url(entry_url, platform)
+                if entry_url in seen:
+                    continue
+                seen.add(entry_url)
+                if not is_valid_url(entry_url, platform):
+                    with _download_jobs_lock:
+                        batch['skipped'] += 1
+                    continue
+                with _download_jobs_changed:
+                    while count_batch_queued_jobs(batch) >= BATCH_PREFETCH_JOBS:
+                        _download_jobs_changed.wait(timeout=5)
+                job_id = submit_download_job(dict(batch['params'], url=entry_url, platform=platform, batch_id=batch_id))
+                with _download_jobs_changed:
+                    batch['job_ids'].append(job_id)
+                    _download_jobs_changed.notify_all()
+    except Exception as e:
+        logger.warning(f"Batch expansion failed batch_id={batch_id}: {e}")
+        with _download_jobs_lock:
+            batch['expansion_error'] = str(e)
+    finally:
+        with _download_jobs_changed:
+            batch['expanding'] = False
+            _download_jobs_changed.notify_all()
+        debug_log("batch expanded batch_id=%s jobs=%s skipped=%s", batch_id, len(batch['job_ids']), batch['skipped'])
+
+def serialize_download_batch(batch):
+    counts = {'queued': 0, 'running': 0, 'completed': 0, 'failed': 0}
+    downloaded_bytes = 0
+    total_bytes = 0
+    jobs = []
+    for job_id in batch['job_ids']:
+        job = _download_jobs.get(job_id)
+        if not job:
+            continue
+        counts[job['status']] = counts.get(job['status'], 0) + 1
+        progress = job.get('progress') or {}
+        downloaded_bytes += progress.get('downloaded_bytes') or 0
+        total_bytes += progress.get('total_bytes') or 0
+        jobs.append(serialize_download_job(job))
+    total = len(batch['job_ids'])
+    finished = counts['completed'] + counts['failed']
+    if batch['expanding']:
+        status = 'expanding'
+    elif finished < total:
+        status = 'running'
+    else:
+        status = 'completed'
+    return {
+        'batch_id': batch['id'],
+        'status': status,
+        'created_at': batch['created_at'],
+        'total': total,
+        'counts': counts,
+        'skipped': batch['skipped'],
+        'percent': round(finished * 100 / total, 1) if total else (0 if batch['expanding'] else 100),
+        'downloaded_bytes': downloaded_bytes,
+        'total_bytes': total_bytes,
+        'expansion_error': batch.get('expansion_error'),
+        'jobs': jobs,
+    }
+
+@app.route('/api/download', methods=['POST'])
+def download_video():
+    data = request.json or {}
+    logger.info(f"Received download request: {data}")
+
+    video_url = data.get('url')
+    platform = data.get('platform', 'youtube')
+
+    if not video_url:
+        return jsonify({'error': 'URL이 제공되지 않았습니다'}), 400
+
+    if not is_valid_url(video_url, platform):
+        return jsonify({'error': f'유효한 {platform} URL이 아닙니다'}), 400
+
+    tuning, tuning_error = normalize_download_tuning(data.get('tuning'), APP_SETTINGS.get('download_tuning'))
+    if tuning_error:
+        return jsonify({'error': tuning_error}), 400
+
+    if count_pending_download_jobs() >= DOWNLOAD_MAX_PENDING_JOBS:
+        return jsonify({'error': '대기 중인 다운로드가 너무 많습니다. 잠시 후 다시 시도해주세요.'}), 429
+
+    params = {
+        'url': video_url,
+        'format': data.get('format', 'best'),  # 기본값 'best' 추가
+        'quality': data.get('quality', 'best'),
+        'platform': platform,
+        'filename': data.get('filename', ''),
+        'race': data.get('race'),
+        'tuning': tuning,
+        'url_root': request.url_root,
+    }
+    app_url = request.url_root.rstrip('/')
+
+    # 이미 받아둔 파일이면 작업 대기 없이 바로 링크를 돌려준다.
+    stored = find_stored_download(params)
+    if stored:
+        job_id = submit_download_job(params, result=stored)
+        return jsonify(dict(stored, job_id=job_id, status='completed'))
+
+    job_id = submit_download_job(params)
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f"{app_url}/api/downloads/{job_id}",
+        'events_url': f"{app_url}/api/downloads/{job_id}/events",
+    }), 202
+
+@app.route('/api/batches', methods=['POST'])
+def create_download_batch():
+    """
+    Queue many downloads at once: a list of URLs and/or playlist/channel URLs.
+    Items are strings (using the request's platform) or {"url", "platform"} objects.
+    """
+    data = request.json or {}
+    items, items_error = parse_url_items(data)
+    if items_error:
+        return jsonify({'error': items_error}), 400
+
+    tuning, tuning_error = normalize_download_tuning(data.get('tuning'), APP_SETTINGS.get('download_tuning'))
+    if tuning_error:
+        return jsonify({'error': tuning_error}), 400
+
+    if count_pending_download_jobs() >= DOWNLOAD_MAX_PENDING_JOBS:
+        return jsonify({'error': '대기 중인 다운로드가 너무 많습니다. 잠시 후 다시 시도해주세요.'}), 429
+
+    batch_id = str(uuid.uuid4())
+    batch = {
+        'id': batch_id,
+        'items': items,
+        'params': {
+            'format': data.get('format', 'best'),
+            'quality': data.get('quality', 'best'),
+            'filename': '',
+            'race': data.get('race'),
+            'tuning': tuning,
+            'url_root': request.url_root,
+        },
+        'job_ids': [],
+        'skipped': 0,
+        'expanding': True,
+        'expansion_error': None,
+        'created_at': time.time(),
+    }
+    with _download_jobs_lock:
+        _download_batches[batch_id] = batch
+    threading.Thread(target=run_batch_expansion, args=(batch_id,), name='bava-batch-expand', daemon=True).start()
+
+    app_url = request.url_root.rstrip('/')
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'status_url': f"{app_url}/api/batches/{batch_id}",
+    }), 202
+
+@app.route('/api/batches/<batch_id>', methods=['GET'])
+def get_download_batch_status(batch_id):
+    with _download_jobs_lock:
+        batch = _download_batches.get(batch_id)
+        if not batch:
+            return jsonify({'error': '다운로드 작업을 찾을 수 없습니다'}), 404
+        data = serialize_download_batch(batch)
+    return jsonify({'success': True, 'data': data})
+
+@app.route('/api/downloads', methods=['GET'])
+def list_download_jobs():
+    prune_download_jobs()
+    with _download_jobs_lock:
+        jobs = sorted(_download_jobs.values(), key=lambda job: job['created_at'], reverse=True)
+        data = [serialize_download_job(job) for job in jobs]
+    return jsonify({'success': True, 'data': data})
+
+@app.route('/api/downloads/<job_id>', methods=['GET'])
+def get_download_job_status(job_id):
+    job = get_download_job(job_id)
+    if not job:
+        return jsonify({'error': '다운로드 작업을 찾을 수 없습니다'}), 404
+    return jsonify({'success': True, 'data': serialize_download_job(job)})
+
+def format_sse_event(event, payload, event_id=None):
+    id_line = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{id_line}event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def stream_download_job_events(job_id, last_revision=-1):
+    """
+    SSE body for one job. Each response ends after DOWNLOAD_EVENTS_MAX_SECONDS so it never
+    outlives a worker timeout; the browser reconnects with Last-Event-ID (the job revision)
+    and resumes without replaying events it already has.
+    """
+    deadline = time.time() + DOWNLOAD_EVENTS_MAX_SECONDS
+    yield f"retry: {DOWNLOAD_EVENTS_RETRY_MS}\n\n"
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        with _download_jobs_changed:
+            job = _download_jobs.get(job_id)
+            if job and job['revision'] == last_revision and job['status'] in ('queued', 'running'):
+                _download_jobs_changed.wait(timeout=min(DOWNLOAD_EVENTS_KEEPALIVE_SECONDS, remaining))
+                job = _download_jobs.get(job_id)
+            snapshot = dict(job) if job else None
+
+        if not snapshot:
+            yield format_sse_event('error', {'error': '다운로드 작업을 찾을 수 없습니다'})
+            return
+        if snapshot['revision'] == last_revision and snapshot['status'] in ('queued', 'running'):
+            yield ': keepalive\n\n'
+            continue
+
+        last_revision = snapshot['revision']
+        payload = serialize_download_job(snapshot)
+        if snapshot['status'] in ('completed', 'failed'):
+            yield format_sse_event('done', payload, last_revision)
+            return
+        yield format_sse_event('progress', payload, last_revision)
+
+@app.route('/api/downloads/<job_id>/events', methods=['GET'])
+def download_job_events(job_id):
+    if not get_download_job(job_id):
+        return jsonify({'error': '다운로드 작업을 찾을 수 없습니다'}), 404
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    return Response(
+        stream_download_job_events(job_id, int(last_event_id) if last_event_id.isdigit() else -1),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+def build_single_file_selector(selector):
+    """Drop the merge alternatives (a+b) from a selector so only single-file formats remain."""
+    alternatives = [part for part in str(selector or '').split('/') if part and '+' not in part]
+    return '/'.join(alternatives) or 'best'
+
+def resolve_stream_source(video_url, platform, selector):
+    """
+    Pick a single-file, plain HTTP(S) format that can be proxied as-is.
+    Returns the resolved info dict; raises MediaDownloadError when the media needs a merge
+    or a manifest download (HLS/DASH) and has to go through /api/download instead.
+    """
+    base_opts = {
+        'format': selector,
+        'quiet': True,
+        'no_warnings': True,
+        'nocheckcertificate': True,
+        'http_headers': {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        }
+    }
+    if platform == 'youtube':
+        attempts = order_download_attempts(build_youtube_download_attempts('best', 'best', selector))[:-1]
+    else:
+        attempts = [{'label': 'primary', 'format': selector, 'extractor_args': None}]
+    cached_info = get_cached_extraction(platform, video_url)
+    if cached_info is not None:
+        attempts = [{'label': 'cached-info', 'format': selector, 'extractor_args': None, 'info': cached_info}] + attempts
+
+    last_error = None
+    throttle_failures = 0
+    for attempt in attempts:
+        opts = dict(base_opts)
+        if attempt.get('extractor_args'):
+            opts['extractor_args'] = attempt['extractor_args']
+        if attempt.get('info') is None:
+            try:
+                acquire_rate_limit(platform, 'extract')
+            except MediaDownloadError as e:
+                last_error = last_error or e
+                continue
+        try:
+            with pooled_youtube_dl(opts, platform) as ydl:
+                if attempt.get('info') is not None:
+                    info = ydl.process_ie_result(attempt['info'], download=False)
+                else:
+                    info = ydl.extract_info(video_url, download=False)
+        except yt_dlp.utils.DownloadError as e:
+            last_error = e
+            if is_throttle_error(str(e)):
+                throttle_failures += 1
+            debug_log("stream resolve failed label=%s err=%s", attempt['label'], str(e))
+            continue
+        if isinstance(info, dict) and info.get('entries'):
+            entries = [entry for entry in info.get('entries', []) if entry]
+            info = entries[0] if entries else None
+        if not info:
+            continue
+        ext = str(info.get('ext') or '').lower()
+        if info.get('requested_formats') or ext not in MEDIA_EXTS:
+            continue
+        if info.get('protocol') not in ('http', 'https') or not info.get('url'):
+            raise MediaDownloadError('스트리밍으로 받을 수 없는 형식입니다. 일반 다운로드를 이용해주세요.', 409)
+        return info
+
+    if throttle_failures:
+        report_platform_throttled(platform)
+    if last_error:
+        raise last_error
+    raise MediaDownloadError('스트리밍으로 받을 수 없는 형식입니다. 일반 다운로드를 이용해주세요.', 409)
+
+STREAM_COOKIE_ATTRIBUTES = {'domain', 'path', 'secure', 'expires', 'version', 'httponly', 'max-age', 'samesite'}
+
+def build_stream_cookie_header(cookies):
+    """
+    Cookie header for the media URL from yt-dlp's `cookies` field. yt-dlp strips `Cookie` from
+    http_headers and lists the cookies scoped to the URL there instead ("a=1; Domain=...; Path=/").
+    """
+    pairs = []
+    for part in str(cookies or '').split(';'):
+        name, sep, value = part.strip().partition('=')
+        if name and sep and name.lower() not in STREAM_COOKIE_ATTRIBUTES:
+            pairs.append(f"{name}={value}")
+    return '; '.join(pairs)
+
+def build_content_disposition(filename):
+    stem, ext_with_dot = os.path.splitext(filename)
+    ascii_stem = stem.encode('ascii', 'ignore').decode('ascii').replace('"', '').strip() or 'video'
+    ascii_name = f"{ascii_stem}{ext_with_dot}"
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+@app.route('/api/stream', methods=['GET'])
+def stream_video():
+    """
+    Pipe a single-file format from upstream to the client without staging it on disk.
+    Range requests are forwarded so players and download managers can seek and resume.
+    """
+    video_url = request.args.get('url', '')
+    platform = request.args.get('platform', 'youtube')
+    format_code = request.args.get('format', 'best')
+    quality = request.args.get('quality', 'best')
+    custom_filename = request.args.get('filename', '')
+
+    if not video_url:
+        return jsonify({'error': 'URL이 제공되지 않았습니다'}), 400
+    if not is_valid_url(video_url, platform):
+        return jsonify({'error': f'유효한 {platform} URL이 아닙니다'}), 400
+
+    video_url = clean_platform_url(video_url, platform)
+    selector = build_single_file_selector(build_format_selector(format_code, quality, platform))
+    try:
+        info = resolve_stream_source(video_url, platform, selector)
+    except MediaDownloadError as e:
+        return jsonify({'error': e.message}), e.status_code
+    except yt_dlp.utils.DownloadError as e:
+        logger.warning(f"yt-dlp stream resolve error: {e}")
+        return jsonify({'error': f'다운로드 가능한 포맷을 찾지 못했습니다: {str(e)}'}), 400
+
+    upstream_headers = dict(info.get('http_headers') or {})
+    # TikTok CDN은 추출 때 받은 쿠키(tt_chain_token 등)가 없으면 403을 준다.
+    cookie_header = build_stream_cookie_header(info.get('cookies'))
+    if cookie_header:
+        upstream_headers['Cookie'] = cookie_header
+    if request.headers.get('Range'):
+        upstream_headers['Range'] = request.headers['Range']
+    try:
+        upstream = requests.get(info['url'], headers=upstream_headers, stream=True, timeout=(10, 60))
+    except Exception as e:
+        logger.warning(f"Upstream stream request failed: {e}")
+        return jsonify({'error': f'원본 서버에 연결하지 못했습니다: {str(e)}'}), 502
+    if upstream.status_code not in (200, 206):
+        upstream.close()
+        debug_log("stream upstream status=%s url=%s", upstream.status_code, video_url)
+        return jsonify({'error': f'원본 서버가 요청을 거부했습니다 (HTTP {upstream.status_code})'}), 502
+
+    ext = str(info.get('ext') or 'mp4').lower()
+    filename = f"{sanitize_filename(custom_filename or info.get('title'))}.{ext}"
+    headers = {
+        'Content-Disposition': build_content_disposition(filename),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'no-store',
+    }
+    for name in ('Content-Length', 'Content-Range'):
+        if upstream.headers.get(name):
+            headers[name] = upstream.headers[name]
+    debug_log("stream start url=%s ext=%s status=%s", video_url, ext, upstream.status_code)
+
+    def generate():
+        try:
+            for chunk in upstream.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                if chunk:
+                    yield chunk
+        finally:
+            upstream.close()
+
+    return Response(
+        generate(),
+        status=upstream.status_code,
+        headers=headers,
+        mimetype=upstream.headers.get('Content-Type') or 'application/octet-stream',
+        direct_passthrough=True,
+    )
 
 @app.route('/api/files/<file_ref>', methods=['GET'])
 def serve_file(file_ref):
@@ -844,7 +3768,10 @@ def serve_file(file_ref):
     content_types = {
         'mp4': 'video/mp4',
         'webm': 'video/webm',
-        'mp3': 'audio/mpeg'
+        'mp3': 'audio/mpeg',
+        'm4a': 'audio/mp4',
+        'mkv': 'video/x-matroska',
+        'mov': 'video/quicktime',
     }
     
     # 확장자에 맞는 Content-Type이 없을 경우 기본값 사용
@@ -855,12 +3782,134 @@ def serve_file(file_ref):
     debug_log("serve hit ref=%s name=%s mime=%s", file_ref, download_name, content_type)
     
     # 파일 제공 및 다운로드 설정
-    return send_file(
+    # conditional=True: Range/If-Range 요청에 206으로 응답하고 ETag/Last-Modified 검증자를 붙여
+    # 끊긴 다운로드를 처음부터 다시 받지 않도록 한다.
+    response = send_file(
         file_path,
         as_attachment=True,
         download_name=download_name,
-        mimetype=content_type
+        mimetype=content_type,
+        conditional=True,
+        etag=True,
+    )
+    # 전송 중인 파일은 정리 대상에서 제외한다.
+    # 본문은 wsgi.file_wrapper 그대로 두어 서버의 sendfile 경로를 살린다. direct_passthrough 응답은
+    # call_on_close가 전송 뒤에 불리지 않으므로, 서버가 부르는 본문 close에 정리와 바이트 집계를 붙인다.
+    # 바이트 수는 (Range가 반영된) Content-Length 기준이다.
+    sent_bytes = 0 if request.method == 'HEAD' or response.status_code in (304, 412) else (response.content_length or 0)
+    serving_id = start_serving_path(file_path)
+    body = response.response
+    close_body = body.close
+
+    def close_and_release():
+        try:
+            close_body()
+        finally:
+            metric_inc('bava_files_served_bytes_total', sent_bytes)
+            finish_serving_path(file_path, serving_id)
+
+    body.close = close_and_release
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    with _download_jobs_lock:
+        job_counts = {}
+        for job in _download_jobs.values():
+            job_counts[job['status']] = job_counts.get(job['status'], 0) + 1
+    with _extract_cache_lock:
+        extract_cache_size = len(_extract_cache)
+    with _serving_paths_lock:
+        serving = sum(_serving_paths.values())
+    gauges = [
+        ('bava_download_tokens', 'Live /api/files download tokens.', [({}, _download_file_cache.count())]),
+        ('bava_extract_cache_entries', 'Entries in the extraction cache.', [({}, extract_cache_size)]),
+        ('bava_download_jobs', 'Download jobs currently tracked, by status.',
+         [({'status': status}, count) for status, count in sorted(job_counts.items())]),
+        ('bava_download_workers', 'Configured download worker threads.', [({}, DOWNLOAD_MAX_WORKERS)]),
+        ('bava_files_serving', 'Responses currently streaming from /api/files.', [({}, serving)]),
+    ]
+    return Response(render_metrics(gauges), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/stats/extract-cache', methods=['GET'])
+def get_extract_cache_stats():
+    with _extract_cache_lock:
+        data = dict(_extract_cache_stats)
+        data['size'] = len(_extract_cache)
+    data['max_entries'] = EXTRACT_CACHE_MAX_ENTRIES
+    data['ttl_seconds'] = EXTRACT_CACHE_TTL_SECONDS
+    return jsonify({'success': True, 'data': data})
+
+@app.route('/api/stats/short-links', methods=['GET'])
+def get_short_link_stats():
+    with _short_link_cache_lock:
+        data = dict(_short_link_cache_stats)
+        data['size'] = len(_short_link_cache)
+    data['max_entries'] = SHORT_LINK_CACHE_MAX_ENTRIES
+    data['ttl_seconds'] = SHORT_LINK_CACHE_TTL_SECONDS
+    return jsonify({'success': True, 'data': data})
+
+@app.route('/api/stats/thumbnails', methods=['GET'])
+def get_thumbnail_stats():
+    with _thumbnail_stats_lock:
+        data = dict(_thumbnail_cache_stats)
+    data.update(files=0, bytes=0, max_bytes=THUMBNAIL_CACHE_MAX_BYTES)
+    if THUMBNAIL_INDEX_ENABLED:
+        with closing(connect_thumbnail_index()) as conn:
+            row = conn.execute(
+                'SELECT COUNT(*) AS files, COALESCE(SUM(size), 0) AS bytes FROM thumbnails WHERE path IS NOT NULL'
+            ).fetchone()
+        data.update(files=row['files'], bytes=row['bytes'])
+    return jsonify({'success': True, 'data': data})
+
+@app.route('/api/stats/strategies', methods=['GET'])
+def get_strategy_stats():
+    attempts = build_youtube_download_attempts('best', 'best', 'best')
+    with _attempt_stats_lock:
+        labels = [attempt['label'] for attempt in attempts]
+        labels.extend(label for label in _attempt_stats if label not in labels)
+        data = [summarize_attempt_stats(label) for label in labels]
+    # Order without exploration, i.e. what most requests will try right now.
+    ordered = order_download_attempts(attempts, explore=False)
+    return jsonify({
+        'success': True,
+        'data': {
+            'strategies': data,
+            'order': [attempt['label'] for attempt in ordered],
+            'explore_rate': YOUTUBE_STRATEGY_EXPLORE_RATE,
+            'window': YOUTUBE_STRATEGY_WINDOW,
+        }
+    })
+
+@app.route('/api/stats/storage', methods=['GET'])
+def get_storage_stats():
+    with _storage_stats_lock:
+        data = dict(_storage_stats)
+    data.update(
+        quota_bytes=STORAGE_QUOTA_BYTES,
+        min_free_bytes=STORAGE_MIN_FREE_BYTES,
+        managed_dir=DEFAULT_DOWNLOAD_DIR,
+        download_tokens=_download_file_cache.count(),
     )
+    return jsonify({'success': True, 'data': data})
+
+@app.route('/api/stats/rate-limits', methods=['GET'])
+def get_rate_limit_stats():
+    now = time.time()
+    with _rate_limit_lock:
+        platforms = sorted(set(PLATFORM_EXTRACTOR_KEYS) | set(_throttle_state))
+        data = {}
+        for platform in platforms:
+            state = get_throttle_state(platform)
+            data[platform] = {
+                'extract_per_minute': _rate_limits_per_minute['extract'].get(platform),
+                'download_per_minute': _rate_limits_per_minute['download'].get(platform),
+                'consecutive_throttles': state['consecutive_throttles'],
+                'total_throttles': state['total_throttles'],
+                'last_throttled_at': state['last_throttled_at'],
+                'backoff_remaining_seconds': round(max(0.0, state['blocked_until'] - now), 1),
+            }
+    return jsonify({'success': True, 'data': {'platforms': data, 'burst': RATE_LIMIT_BURST}})
 
 @app.route('/api/settings', methods=['GET'])
 def get_settings():
@@ -870,6 +3919,8 @@ def get_settings():
             'app_name': APP_NAME,
             'download_path': get_download_dir(),
             'default_download_path': DEFAULT_DOWNLOAD_DIR,
+            'download_tuning': APP_SETTINGS.get('download_tuning'),
+            'download_tuning_profiles': DOWNLOAD_TUNING_PROFILES,
             'version': APP_VERSION,
             'release': get_release_info(),
         }
@@ -877,7 +3928,7 @@ def get_settings():
 
 @app.route('/api/release', methods=['GET'])
 def get_release():
-    release_data = get_release_info(force_refresh=True)
+    release_data = get_release_info(force_refresh=True, wait=RELEASE_REQUEST_WAIT_SECONDS)
     if not release_data:
         return jsonify({'success': False, 'error': '릴리즈 정보를 찾을 수 없습니다'}), 404
     return jsonify({'success': True, 'data': release_data})
@@ -887,21 +3938,30 @@ def update_settings():
     data = request.json or {}
     requested_path = data.get('download_path', '')
     previous_path = APP_SETTINGS.get('download_dir')
+    previous_tuning = APP_SETTINGS.get('download_tuning')
 
-    if not requested_path:
+    if not requested_path and 'download_tuning' not in data:
         return jsonify({'error': '다운로드 경로를 입력해주세요'}), 400
 
-    is_valid, normalized_path, validation_error = validate_download_dir(requested_path)
-    if not is_valid:
-        return jsonify({'error': validation_error}), 400
+    normalized_path = previous_path
+    if requested_path:
+        is_valid, normalized_path, validation_error = validate_download_dir(requested_path)
+        if not is_valid:
+            return jsonify({'error': validation_error}), 400
+
+    tuning, tuning_error = normalize_download_tuning(data.get('download_tuning'), previous_tuning)
+    if tuning_error:
+        return jsonify({'error': tuning_error}), 400
 
     try:
         APP_SETTINGS['download_dir'] = normalized_path
+        APP_SETTINGS['download_tuning'] = tuning
         save_settings(APP_SETTINGS)
-        logger.info(f"Updated download directory: {normalized_path}")
-        return jsonify({'success': True, 'download_path': normalized_path})
+        logger.info(f"Updated settings: download_dir={normalized_path} download_tuning={tuning}")
+        return jsonify({'success': True, 'download_path': normalized_path, 'download_tuning': tuning})
     except Exception as e:
         APP_SETTINGS['download_dir'] = previous_path or DEFAULT_DOWNLOAD_DIR
+        APP_SETTINGS['download_tuning'] = previous_tuning
         logger.error(f"Failed to update settings: {e}")
         return jsonify({'error': f'경로 저장 중 오류가 발생했습니다: {str(e)}'}), 500
 
@@ -929,14 +3989,75 @@ def browse_folder():
         return jsonify({'error': '폴더 경로를 찾을 수 없습니다'}), 404
     return jsonify({'success': True, 'path': discovered[0], 'candidates': discovered, 'source': 'fallback'})
 
+@app.route('/api/health', methods=['GET'])
+def health():
+    return jsonify({
+        'success': True,
+        'data': {
+            'status': 'ok',
+            'version': APP_VERSION,
+            'warmed_up': _warmup_done.is_set(),
+            'yt_dlp_loaded': yt_dlp.loaded,
+            'uptime_seconds': round(time.perf_counter() - _startup_started_at, 1),
+            'startup_ms': dict(_startup_timings),
+        }
+    })
+
 @app.route('/')
 def index():
-    # 첫 번째 요청에서 정리 함수 실행
-    cleanup_old_files()
     return render_template('index.html', app_version=APP_VERSION, app_name=APP_NAME, release_info=get_release_info())
 
+def log_startup_timings():
+    total = round((time.perf_counter() - _startup_started_at) * 1000, 1)
+    breakdown = ', '.join(f"{name}={ms}ms" for name, ms in _startup_timings.items())
+    logger.info(f"Startup {total}ms: {breakdown}")
+
+def warm_up():
+    """Import yt-dlp and load the common extractors off the request path."""
+    try:
+        with startup_phase('warm_up'):
+            yt_dlp.load()
+            requests.load()
+            for ie_key in PLATFORM_EXTRACTOR_KEYS.values():
+                yt_dlp.extractor.get_info_extractor(ie_key)
+    except Exception as e:
+        logger.warning(f"Warm-up failed: {e}")
+    finally:
+        _warmup_done.set()
+        debug_log("warm-up done timings=%s", dict(_startup_timings))
+
+def start_warm_up():
+    if STARTUP_WARMUP and not _warmup_done.is_set():
+        threading.Thread(target=warm_up, name='bava-warm-up', daemon=True).start()
+
+def start_background_services(use_reloader=False):
+    """
+    Resume journaled jobs and start the journal heartbeat, storage janitor and release
+    refresher. Called by each serving process (entrypoints, gunicorn post_fork), never at
+    import: under the werkzeug reloader the parent process only watches files, so it must
+    not claim the journal lease or run jobs the serving child cannot report on.
+    """
+    global _background_services_started
+    if use_reloader and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return
+    with _background_services_lock:
+        if _background_services_started:
+            return
+        _background_services_started = True
+    with startup_phase('job_resume'):
+        renew_journal_lease()
+        resume_journaled_jobs()
+        start_journal_heartbeat()
+    start_storage_janitor()
+    start_release_refresher()
+
+_startup_timings['module'] = round((time.perf_counter() - _startup_started_at) * 1000, 1)
+log_startup_timings()
+start_warm_up()
+
 if __name__ == '__main__':
     flask_host = os.environ.get('FLASK_HOST', '0.0.0.0')
     flask_port = int(os.environ.get('FLASK_PORT', '5252'))
     flask_debug = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
+    start_background_services(use_reloader=flask_debug)
     app.run(debug=flask_debug, host=flask_host, port=flask_port)
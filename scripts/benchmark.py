@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline benchmark for the download pipeline.
+
+Starts a local fake media origin and the Flask app in this process, then drives the app
+over real HTTP at the requested concurrency. The origin serves synthetic direct MP4/WebM
+files, HLS playlists and DASH manifests with configurable size, latency and bandwidth;
+yt-dlp reaches them through its generic extractor, so no network access is needed.
+
+Scenarios:
+  download  POST /api/download -> wait for the job (SSE) -> GET /api/files/<token>
+  serve     GET /api/files/<token> for a pre-registered file (delivery path only)
+
+Examples:
+  python scripts/benchmark.py --scenario download --kind mp4 --size 20M --requests 40 --concurrency 4
+  python scripts/benchmark.py --scenario download --kind hls --segments 50 --latency 0.05
+  python scripts/benchmark.py --scenario serve --size 200M --requests 20 --concurrency 8 --json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BENCH_PLATFORM = 'benchmark'
+PATTERN_BLOCK_SIZE = 64 * 1024
+CONTENT_TYPES = {
+    'mp4': 'video/mp4',
+    'webm': 'video/webm',
+    'ts': 'video/mp2t',
+    'm4s': 'video/iso.segment',
+    'm3u8': 'application/vnd.apple.mpegurl',
+    'mpd': 'application/dash+xml',
+}
+
+
+class FakeOrigin:
+    """Synthetic media origin. Every body is a repeated pseudo-random block, so any byte range is cheap."""
+
+    def __init__(self, size, segments, latency, bandwidth):
+        self.size = size
+        self.segments = max(1, segments)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.block = random.Random(0).randbytes(PATTERN_BLOCK_SIZE)
+        self.bytes_sent = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = None
+
+    @property
+    def segment_size(self):
+        return max(1, self.size // self.segments)
+
+    def start(self):
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # yt-dlp drops keep-alive connections between requests; that is not an error here.
+                    pass
+
+            def do_HEAD(self):
+                origin.handle(self, head=True)
+
+            def do_GET(self):
+                origin.handle(self, head=False)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='bench-origin', daemon=True).start()
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def media_url(self, base_url, kind, item):
+        # 항목마다 다른 URL을 써서 미디어 인덱스/single-flight가 결과를 재사용하지 않게 한다.
+        if kind == 'hls':
+            return f'{base_url}/hls/{item}/index.m3u8'
+        if kind == 'dash':
+            return f'{base_url}/dash/{item}/manifest.mpd'
+        return f'{base_url}/media/{item}.{kind}'
+
+    def hls_playlist(self, item):
+        duration = 2
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{duration}', '#EXT-X-MEDIA-SEQUENCE:0']
+        for idx in range(self.segments):
+            lines.append(f'#EXTINF:{duration}.0,')
+            lines.append(f'/hls/{item}/seg{idx}.ts')
+        lines.append('#EXT-X-ENDLIST')
+        return ('\n'.join(lines) + '\n').encode()
+
+    def dash_manifest(self, item):
+        duration = 2 * self.segments
+        segment_urls = ''.join(f'<SegmentURL media="seg{idx}.m4s"/>' for idx in range(self.segments))
+        return f'''<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" mediaPresentationDuration="PT{duration}S" minBufferTime="PT2S" profiles="urn:mpeg:dash:profile:isoff-main:2011">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" segmentAlignment="true">
+      <Representation id="bench-{item}" codecs="avc1.4d401e,mp4a.40.2" bandwidth="2000000" width="1280" height="720">
+        <BaseURL>/dash/{item}/</BaseURL>
+        <SegmentList duration="2" timescale="1">
+          <Initialization sourceURL="init.mp4"/>
+          {segment_urls}
+        </SegmentList>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+'''.encode()
+
+    def handle(self, handler, head):
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        path = urlparse(handler.path).path
+        ext = path.rsplit('.', 1)[-1] if '.' in path else ''
+
+        if path.endswith('/index.m3u8'):
+            return self.send_document(handler, self.hls_playlist(path.split('/')[2]), ext, head)
+        if path.endswith('/manifest.mpd'):
+            return self.send_document(handler, self.dash_manifest(path.split('/')[2]), ext, head)
+        if path.startswith('/media/'):
+            return self.send_body(handler, self.size, ext, head)
+        if path.endswith('/init.mp4'):
+            return self.send_body(handler, 1024, 'mp4', head)
+        if path.startswith(('/hls/', '/dash/')):
+            return self.send_body(handler, self.segment_size, ext, head)
+        handler.send_response(404)
+        handler.send_header('Content-Length', '0')
+        handler.end_headers()
+
+    def send_document(self, handler, body, ext, head):
+        handler.send_response(200)
+        handler.send_header('Content-Type', CONTENT_TYPES.get(ext, 'application/octet-stream'))
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if not head:
+            handler.wfile.write(body)
+
+    def send_body(self, handler, size, ext, head):
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d*)-(\d*)', handler.headers.get('Range') or '')
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            handler.send_response(206)
+            handler.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            handler.send_response(200)
+        handler.send_header('Content-Type', CONTENT_TYPES.get(ext, 'application/octet-stream'))
+        handler.send_header('Content-Length', str(end - start + 1))
+        handler.send_header('Accept-Ranges', 'bytes')
+        handler.end_headers()
+        if head:
+            return
+        try:
+            self.write_pattern(handler.wfile, start, end + 1)
+        except (BrokenPipeError, ConnectionResetError):
+            # yt-dlp's generic extractor only reads the headers of direct links.
+            pass
+
+    def write_pattern(self, wfile, start, stop):
+        position = start
+        window_started_at, window_bytes = time.time(), 0
+        while position < stop:
+            offset = position % PATTERN_BLOCK_SIZE
+            chunk = self.block[offset:offset + min(PATTERN_BLOCK_SIZE - offset, stop - position)]
+            wfile.write(chunk)
+            position += len(chunk)
+            with self.lock:
+                self.bytes_sent += len(chunk)
+            if self.bandwidth:
+                window_bytes += len(chunk)
+                ahead = window_bytes / self.bandwidth - (time.time() - window_started_at)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KiB, macOS는 바이트 단위로 보고한다.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def summarize(samples, wall_seconds, origin):
+    ok = [sample for sample in samples if sample['ok']]
+    total_bytes = sum(sample['bytes'] for sample in ok)
+    summary = {
+        'requests': len(samples),
+        'succeeded': len(ok),
+        'failed': len(samples) - len(ok),
+        'wall_seconds': round(wall_seconds, 3),
+        'bytes': total_bytes,
+        'mb_per_second': round(total_bytes / (1024 * 1024) / wall_seconds, 2) if wall_seconds else None,
+        'peak_rss_mb': round(peak_rss_bytes() / (1024 * 1024), 1) if peak_rss_bytes() else None,
+        'origin_requests': origin.requests,
+        'origin_bytes': origin.bytes_sent,
+        'latency': {},
+        'errors': sorted({sample['error'] for sample in samples if sample.get('error')}),
+    }
+    for phase in ('total', 'job', 'fetch'):
+        values = [sample[phase] for sample in ok if sample.get(phase) is not None]
+        if values:
+            summary['latency'][phase] = {
+                f'p{pct}': round(percentile(values, pct), 4) for pct in (50, 95, 99)
+            }
+            summary['latency'][phase]['max'] = round(max(values), 4)
+    return summary
+
+
+def fetch_file(session, url):
+    started_at = time.time()
+    received = 0
+    with session.get(url, stream=True, timeout=300) as res:
+        res.raise_for_status()
+        for chunk in res.iter_content(chunk_size=256 * 1024):
+            received += len(chunk)
+    return received, time.time() - started_at
+
+
+def run_download_item(app_url, origin_url, origin, args, item, sessions):
+    import requests
+
+    session = sessions.setdefault(threading.get_ident(), requests.Session())
+    sample = {'ok': False, 'bytes': 0}
+    started_at = time.time()
+    try:
+        res = session.post(f'{app_url}/api/download', json={
+            'url': origin.media_url(origin_url, args.kind, item),
+            'platform': BENCH_PLATFORM,
+            'format': 'best',
+            'tuning': {'profile': args.profile} if args.profile else None,
+        }, timeout=30)
+        payload = res.json()
+        if res.status_code == 202:
+            with session.get(payload['events_url'], stream=True, timeout=600) as events:
+                for line in events.iter_lines(decode_unicode=True):
+                    if line == 'event: done':
+                        break
+            job = session.get(payload['status_url'], timeout=30).json().get('data') or {}
+            payload = job.get('result') or {'error': f"job ended with status {job.get('status')}"}
+        sample['job'] = time.time() - started_at
+        if not payload.get('download_url'):
+            sample['error'] = str(payload.get('error') or payload)[:200]
+            return sample
+        sample['bytes'], sample['fetch'] = fetch_file(session, payload['download_url'])
+        sample['ok'] = True
+    except Exception as e:
+        sample['error'] = f'{type(e).__name__}: {e}'[:200]
+    sample['total'] = time.time() - started_at
+    return sample
+
+
+def run_serve_item(download_url, sessions):
+    import requests
+
+    session = sessions.setdefault(threading.get_ident(), requests.Session())
+    sample = {'ok': False, 'bytes': 0}
+    started_at = time.time()
+    try:
+        sample['bytes'], sample['fetch'] = fetch_file(session, download_url)
+        sample['ok'] = True
+    except Exception as e:
+        sample['error'] = f'{type(e).__name__}: {e}'[:200]
+    sample['total'] = time.time() - started_at
+    return sample
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Offline benchmark for BaVa Downloader')
+    parser.add_argument('--scenario', choices=('download', 'serve'), default='download')
+    parser.add_argument('--kind', choices=('mp4', 'webm', 'hls', 'dash'), default='mp4',
+                        help='media served by the fake origin (download scenario)')
+    parser.add_argument('--size', default='10M', help='media size, e.g. 512K, 20M, 1G')
+    parser.add_argument('--segments', type=int, default=20, help='HLS/DASH segment count')
+    parser.add_argument('--latency', type=float, default=0.0, help='origin time-to-first-byte per request, seconds')
+    parser.add_argument('--bandwidth', default=None, help='origin bandwidth per response, e.g. 5M (bytes/s)')
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--profile', default=None, help='download tuning profile to request (balanced/fast/gentle)')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    work_dir = tempfile.mkdtemp(prefix='bava_bench_')
+    # 실제 사용자 데이터(다운로드 폴더/토큰/미디어 인덱스/작업 저널/썸네일)를 건드리지 않도록 main을 불러오기 전에 경로를 바꾼다.
+    download_dir = os.path.join(work_dir, 'downloads')
+    os.environ['DEFAULT_DOWNLOAD_DIR'] = download_dir
+    # janitor는 임시 인덱스를 기준으로 고아 파일을 지우므로 벤치마크에서는 켜지 않는다.
+    os.environ['STORAGE_JANITOR_ENABLED'] = 'false'
+    os.environ.setdefault('DOWNLOAD_TOKEN_DB_FILE', os.path.join(work_dir, 'tokens.sqlite3'))
+    os.environ.setdefault('MEDIA_INDEX_DB_FILE', os.path.join(work_dir, 'media.sqlite3'))
+    os.environ.setdefault('JOB_JOURNAL_DB_FILE', os.path.join(work_dir, 'jobs.sqlite3'))
+    os.environ.setdefault('THUMBNAIL_DB_FILE', os.path.join(work_dir, 'thumbnails.sqlite3'))
+    os.environ.setdefault('THUMBNAIL_CACHE_DIR', os.path.join(work_dir, 'thumbnails'))
+    sys.path.insert(0, PROJECT_ROOT)
+
+    import logging
+    from werkzeug.serving import make_server
+    import main as app_module
+
+    # main warms yt-dlp up on a background thread; importing it directly here at the same
+    # time can hit a half-initialised package, so go through main's lazy handle.
+    parse_bytes = app_module.yt_dlp.utils.parse_bytes
+    logging.getLogger('main').setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    # 서버처럼 작업 저널/하트비트를 켠다 (janitor는 위 환경 변수로 꺼져 있다).
+    app_module.start_background_services()
+
+    os.makedirs(download_dir, exist_ok=True)
+    app_module.APP_SETTINGS['download_dir'] = download_dir
+
+    # 앱은 네 플랫폼 도메인만 받으므로 벤치마크 플랫폼에 한해 로컬 오리진을 허용한다.
+    is_valid_url = app_module.is_valid_url
+    app_module.is_valid_url = lambda url, platform: (
+        platform == BENCH_PLATFORM and urlparse(url).hostname == '127.0.0.1'
+    ) or is_valid_url(url, platform)
+
+    origin = FakeOrigin(
+        size=parse_bytes(args.size),
+        segments=args.segments,
+        latency=args.latency,
+        bandwidth=parse_bytes(args.bandwidth) if args.bandwidth else None,
+    )
+    origin_url = origin.start()
+    app_server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=app_server.serve_forever, name='bench-app', daemon=True).start()
+    app_url = f'http://127.0.0.1:{app_server.server_port}'
+
+    sessions = {}
+    try:
+        if args.scenario == 'serve':
+            file_path = os.path.join(download_dir, 'bench.mp4')
+            with open(file_path, 'wb') as f:
+                origin.write_pattern(f, 0, origin.size)
+            app_module.register_download_file('bench-serve', file_path, 'bench.mp4')
+            work = lambda item: run_serve_item(f'{app_url}/api/files/bench-serve', sessions)
+        else:
+            work = lambda item: run_download_item(app_url, origin_url, origin, args, item, sessions)
+
+        started_at = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            samples = list(executor.map(work, range(args.requests)))
+        summary = summarize(samples, time.time() - started_at, origin)
+    finally:
+        app_server.shutdown()
+        origin.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    summary.update(scenario=args.scenario, kind=args.kind, size=origin.size, concurrency=args.concurrency)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"scenario={args.scenario} kind={args.kind} size={args.size} "
+          f"requests={args.requests} concurrency={args.concurrency}")
+    print(f"succeeded={summary['succeeded']} failed={summary['failed']} wall={summary['wall_seconds']}s "
+          f"throughput={summary['mb_per_second']} MB/s peak_rss={summary['peak_rss_mb']} MB")
+    for phase, stats in summary['latency'].items():
+        print(f"  {phase:<6} p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s p99={stats['p99']:.3f}s max={stats['max']:.3f}s")
+    for error in summary['errors']:
+        print(f"  error: {error}")
+
+
+if __name__ == '__main__':
+    main()